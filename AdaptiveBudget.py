@@ -0,0 +1,94 @@
+import math
+
+
+"""
+Chooses how many attempts a source gets from the attempts earlier sources with the same
+features needed, instead of always using max_attempts
+"""
+
+
+# A source that has a spanning tree needs a geometric number of attempts, with the
+# success rate p of one attempt. p is given a beta posterior for every source features
+# (see SourceScheduling.get_source_features()), from every attempt recorded for sources
+# with those features: successes and failed attempts alike, including the attempts of
+# sources that ran out of attempts. Sources without a spanning tree only add failed
+# attempts, which lowers the estimate and so only makes the budgets larger
+# The prior is the rate of all the attempts recorded, weighted as prior_weight attempts,
+# so features seen rarely get a wide posterior and about max_attempts
+# A source gets the fewest attempts that a source with a spanning tree fails all of with
+# probability at most alpha under the posterior, but at least min_attempts
+# The same budget can be shared by many graphs, so later graphs use what earlier ones saw
+class AdaptiveBudget:
+    def __init__(
+        self,
+        alpha=0.01,
+        min_attempts=10,
+        prior_success_rate=0.05,
+        prior_weight=2,
+    ):
+        self.alpha = alpha
+        self.min_attempts = min_attempts
+        self.prior_success_rate = prior_success_rate
+        self.prior_weight = prior_weight
+
+        # [successes, failed attempts] for every source features, and for all sources
+        self.counts = {}
+        self.total = [0, 0]
+
+    # Parameters (a, b) of the beta posterior of the success rate of one attempt, for
+    # sources with the given features (all sources if None)
+    def get_posterior(self, features=None):
+        successes, failures = self.total
+        pooled_rate = (self.prior_success_rate * self.prior_weight + successes) / (
+            self.prior_weight + successes + failures
+        )
+
+        if features is None:
+            return (
+                self.prior_success_rate * self.prior_weight + successes,
+                (1 - self.prior_success_rate) * self.prior_weight + failures,
+            )
+
+        successes, failures = self.counts.get(features, (0, 0))
+        return (
+            pooled_rate * self.prior_weight + successes,
+            (1 - pooled_rate) * self.prior_weight + failures,
+        )
+
+    # Probability that a source with a spanning tree fails attempts attempts in a row,
+    # the mean of (1 - p)^attempts over the posterior of p
+    def get_failure_probability(self, attempts, features=None):
+        a, b = self.get_posterior(features)
+        return math.exp(
+            math.lgamma(b + attempts)
+            - math.lgamma(b)
+            + math.lgamma(a + b)
+            - math.lgamma(a + b + attempts)
+        )
+
+    # Attempts to give the next source, at most max_attempts
+    def get_budget(self, max_attempts, features=None):
+        a, b = self.get_posterior(features)
+
+        failure_probability = 1.0
+        for attempts in range(1, max_attempts + 1):
+            failure_probability *= (b + attempts - 1) / (a + b + attempts - 1)
+            if failure_probability <= self.alpha:
+                return min(max(attempts, self.min_attempts), max_attempts)
+
+        return max_attempts
+
+    # Probability that a source with a spanning tree would have succeeded within the
+    # given attempts, which is the confidence in a source that failed all of them
+    def get_confidence(self, attempts, features=None):
+        return 1 - self.get_failure_probability(attempts, features)
+
+    # Records the attempts a source was given, succeeded tells if the last one succeeded
+    def record(self, attempts, succeeded, features=None):
+        all_counts = [self.total]
+        if features is not None:
+            all_counts.append(self.counts.setdefault(features, [0, 0]))
+
+        for counts in all_counts:
+            counts[0] += int(succeeded)
+            counts[1] += attempts - int(succeeded)
@@ -0,0 +1,228 @@
+import numpy as np
+from PreparedGraph import prepare_graph
+import DistancePrefilter
+import Instrumentation
+
+
+"""
+Runs many randomized trials of the greedy broadcast spanning tree algorithm at once,
+storing the state of every trial as rows of NumPy arrays
+"""
+
+
+# Padded neighbour table and adjacency matrix of a prepared graph
+# Node n is a sentinel: it pads the neighbour table, is never unvisited and has no
+# neighbours, so inactive trials and padding slots need no special casing
+def get_batch_arrays(G):
+    G = prepare_graph(G)
+
+    if "batch_arrays" not in G.cache:
+        n = G.number_of_nodes
+        max_degree = max(G.degree, default=0)
+
+        neighbor_table = np.full((n + 1, max(max_degree, 1)), n, dtype=np.intp)
+        adjacency = np.zeros((n + 1, n + 1), dtype=np.int16)
+        for node in range(n):
+            node_neighbors = G.neighbors[node]
+            neighbor_table[node, : len(node_neighbors)] = node_neighbors
+            adjacency[node, list(node_neighbors)] = 1
+
+        degree = np.zeros(n + 1, dtype=np.int16)
+        degree[:n] = G.degree
+
+        G.cache["batch_arrays"] = (neighbor_table, adjacency, degree)
+
+    return G.cache["batch_arrays"]
+
+
+# Runs trials independent attempts of is_spanning_tree_possible() from every source
+# Returns a boolean array of shape (len(sources), trials) with the success of each trial
+def run_trials(G, sources, broadcast_time, trials, rng=None):
+    # One row per trial, trials of the same source are next to each other
+    trial_sources = np.repeat(np.asarray(sources, dtype=np.intp), trials)
+    return _run_trial_rows(G, trial_sources, broadcast_time, rng).reshape(
+        len(sources), trials
+    )
+
+
+# Runs one attempt of is_spanning_tree_possible() from the source of every row
+# Returns a boolean array with the success of each row
+def _run_trial_rows(G, trial_sources, broadcast_time, rng=None):
+    G = prepare_graph(G)
+    if rng is None:
+        rng = np.random.default_rng()
+
+    neighbor_table, adjacency, degree = get_batch_arrays(G)
+    n = G.number_of_nodes
+    width = neighbor_table.shape[1]
+
+    rows = np.arange(len(trial_sources))
+    total_trials = len(rows)
+    stride = n + 1
+
+    # The arrays of every trial are rows of stride entries, indexed through their flat
+    # views with row_starts + node, which NumPy does faster than two dimensional indexing
+    row_starts = rows * stride
+    row_starts_column = row_starts[:, None]
+    neighbor_row_starts = (rows * width)[:, None]
+
+    visited = np.zeros((total_trials, stride), dtype=bool)
+    visited[:, n] = True
+    visited[rows, trial_sources] = True
+    flat_visited = visited.ravel()
+
+    expected_children = np.zeros((total_trials, stride), dtype=np.int16)
+    expected_children[rows, trial_sources] = broadcast_time
+    flat_expected_children = expected_children.ravel()
+
+    # Same preprocessing as the scalar version, the source's neighbours lose one degree
+    remaining_degree = np.tile(degree, (total_trials, 1))
+    remaining_degree -= adjacency[trial_sources]
+    flat_remaining_degree = remaining_degree.ravel()
+
+    queue = np.full((total_trials, n), n, dtype=np.intp)
+    queue[:, 0] = trial_sources
+    tail = np.ones(total_trials, dtype=np.intp)
+
+    ranks = np.arange(width)
+
+    # Every trial pops exactly one node per step, so step s handles queue[:, s]
+    for step in range(n):
+        if not (tail > step).any():
+            break
+
+        current_nodes = queue[:, step]
+        neighbors = neighbor_table[current_nodes]
+        neighbor_index = row_starts_column + neighbors
+        unvisited = ~flat_visited[neighbor_index]
+
+        # Sorting by remaining degree plus a uniform [0, 1) offset is the same as
+        # shuffling and then stable sorting by remaining degree
+        keys = np.where(
+            unvisited,
+            flat_remaining_degree[neighbor_index] + rng.random(neighbors.shape),
+            -np.inf,
+        )
+        order = np.argsort(-keys, axis=1, kind="stable") + neighbor_row_starts
+        sorted_neighbors = neighbors.ravel()[order]
+        sorted_unvisited = unvisited.ravel()[order]
+
+        children_needed = flat_expected_children[row_starts + current_nodes]
+        selected = sorted_unvisited & (ranks < children_needed[:, None])
+        children = np.where(selected, sorted_neighbors, n)
+
+        # The i-th child picked is expected to have children_needed - 1 - i children
+        child_index = row_starts_column + children
+        flat_visited[child_index] = True
+        flat_expected_children[child_index] = np.where(
+            selected, children_needed[:, None] - 1 - ranks, 0
+        )
+
+        trial_index, rank = np.nonzero(selected)
+        queue[trial_index, tail[trial_index] + rank] = sorted_neighbors[trial_index, rank]
+        tail += selected.sum(axis=1)
+
+        # Every neighbour of a child picked loses one degree, padding and the children
+        # not picked only point at the sentinel
+        flat_remaining_degree -= np.bincount(
+            (row_starts[:, None, None] + neighbor_table[children]).ravel(),
+            minlength=len(flat_remaining_degree),
+        ).astype(np.int16)
+
+    successes = visited[:, :n].all(axis=1)
+
+    # Same metrics as is_spanning_tree_possible(), a failed trial is counted at the
+    # smallest distance from its source of a vertex it did not reach
+    if Instrumentation.enabled:
+        Instrumentation.count("trials", total_trials)
+
+        failed = ~successes
+        if failed.any():
+            distances = DistancePrefilter.get_distance_matrix(G)[trial_sources[failed]]
+            distances = np.where(visited[failed, :n], np.inf, distances)
+            depths, counts = np.unique(distances.min(axis=1), return_counts=True)
+            for depth, depth_count in zip(depths, counts):
+                for _ in range(depth_count):
+                    Instrumentation.observe("failure_depth", int(depth))
+
+    return successes
+
+
+# Runs trials in rounds until each source has a successful trial or max_attempts trials
+# max_attempts can also be a list, with the number of trials of every source
+# A round runs at most batch_size trials, given to the unfinished sources in order. A
+# source gets one trial in its first round and four times as many in each round after,
+# up to batch_size and never more than it has left, so sources that succeed early do
+# not pay for a whole batch. A round costs about as much as a few dozen trials, so the
+# rounds grow fast, and the first sources are settled before later ones take up trials
+# With stop_at_failure, stops as soon as a source used all its trials, like the scalar
+# checks stop at the first source that fails
+# Returns the number of trials up to and including the first success of each source,
+# None for sources that never succeeded, or 0 for sources left unfinished
+def attempts_until_success(
+    G,
+    sources,
+    broadcast_time,
+    max_attempts=200,
+    batch_size=50,
+    rng=None,
+    stop_at_failure=False,
+):
+    G = prepare_graph(G)
+    if rng is None:
+        rng = np.random.default_rng()
+
+    sources = list(sources)
+    if isinstance(max_attempts, int):
+        max_attempts = [max_attempts] * len(sources)
+
+    attempts = [None] * len(sources)
+    used_attempts = [0] * len(sources)
+    round_sizes = [1] * len(sources)
+    pending = [i for i in range(len(sources)) if max_attempts[i] > 0]
+
+    while pending:
+        chosen = []
+        trials = []
+        trials_left = batch_size
+        for i in pending:
+            if trials_left <= 0:
+                break
+
+            chosen.append(i)
+            trials.append(
+                min(round_sizes[i], max_attempts[i] - used_attempts[i], trials_left)
+            )
+            trials_left -= trials[-1]
+
+        successes = _run_trial_rows(
+            G,
+            np.repeat(np.asarray([sources[i] for i in chosen], dtype=np.intp), trials),
+            broadcast_time,
+            rng,
+        )
+
+        finished = set()
+        failed = False
+        for i, source_successes in zip(
+            chosen, np.split(successes, np.cumsum(trials)[:-1])
+        ):
+            if source_successes.any():
+                attempts[i] = used_attempts[i] + int(source_successes.argmax()) + 1
+                finished.add(i)
+                continue
+
+            used_attempts[i] += len(source_successes)
+            round_sizes[i] = min(4 * round_sizes[i], batch_size)
+            if used_attempts[i] >= max_attempts[i]:
+                finished.add(i)
+                failed = True
+
+        pending = [i for i in pending if i not in finished]
+
+        if failed and stop_at_failure:
+            for i in pending:
+                attempts[i] = 0
+            break
+
+    return attempts
@@ -0,0 +1,299 @@
+import networkx as nx
+import argparse
+import contextlib
+import io
+import json
+import math
+import platform
+import random
+import sys
+import time
+import tracemalloc
+import BroadcastGraphs
+import BroadcastTrees
+import CheckBroadcastTime
+import GenerateGraph
+import ProcessIntegerSolutions
+from PreparedGraph import prepare_graph
+
+
+"""
+Measures the speed of the broadcast verification hot path on fixed graphs and seeded
+random candidates, and compares the results with an earlier run
+"""
+
+
+# Rates compared with the baseline and the counts they are worked out from, a lower
+# rate than the baseline is a slowdown
+rate_metrics = {
+    "trials_per_second": "trials",
+    "graphs_per_second": "graphs",
+    "attempts_per_second": "attempts",
+}
+
+
+# Runs every benchmark and returns the results as a dictionary, benchmarks are repeated
+# repeat times and the fastest run is kept. Every benchmark reseeds random with seed, so
+# runs with the same seed do the same work
+# A run loops its benchmark until it took at least min_seconds (see run_for()), so the
+# timing noise stays well below the tolerance of compare_with_baseline()
+def run_benchmarks(
+    seed=0,
+    trials=200,
+    max_attempts=200,
+    candidates=100,
+    repeat=3,
+    solutions_path=None,
+    min_seconds=0.5,
+):
+    if solutions_path is None:
+        solutions_path = ProcessIntegerSolutions.file_path
+
+    rows = ProcessIntegerSolutions.read_solutions(solutions_path)
+    candidate_rows = random.Random(seed).sample(rows, min(candidates, len(rows)))
+
+    benchmarks = {
+        "spanning_tree_trials_graphs": lambda: benchmark_spanning_tree_trials(
+            BroadcastGraphs.graphs, None, trials
+        ),
+        "spanning_tree_trials_trees": lambda: benchmark_spanning_tree_trials(
+            BroadcastTrees.trees, [0], trials
+        ),
+        "broadcast_time_bounded_graphs": lambda: benchmark_broadcast_time_bounded(
+            BroadcastGraphs.graphs, max_attempts
+        ),
+        "create_random_graph": lambda: benchmark_create_random_graph(candidate_rows),
+        "broadcast_time_bounded_candidates": lambda: benchmark_candidates(
+            candidate_rows, max_attempts
+        ),
+    }
+
+    results = {
+        "python": platform.python_version(),
+        "networkx": nx.__version__,
+        "platform": platform.platform(),
+        "time": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "settings": {
+            "seed": seed,
+            "trials": trials,
+            "max_attempts": max_attempts,
+            "candidates": len(candidate_rows),
+            "repeat": repeat,
+            "min_seconds": min_seconds,
+        },
+        "benchmarks": {},
+    }
+
+    for name, benchmark in benchmarks.items():
+        best = None
+        for _ in range(repeat):
+            result = run_for(benchmark, seed, min_seconds)
+            if best is None or (
+                result["seconds"] / result["loops"] < best["seconds"] / best["loops"]
+            ):
+                best = result
+
+        # Memory is measured in a run of its own, since tracemalloc slows the code down
+        random.seed(seed)
+        tracemalloc.start()
+        benchmark()
+        best["peak_memory_bytes"] = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+        results["benchmarks"][name] = best
+        print(format_result(name, best))
+
+    return results
+
+
+# Runs benchmark until the runs took at least min_seconds together, reseeding random
+# with seed before every run so each run does the same work. The seconds and the counts
+# of rate_metrics are added up over the runs and the rates are worked out from the sums,
+# the other results are the same for every run and are taken from the first one
+def run_for(benchmark, seed, min_seconds):
+    total = None
+    loops = 0
+
+    while total is None or total["seconds"] < min_seconds:
+        random.seed(seed)
+        result = benchmark()
+        loops += 1
+
+        if total is None:
+            total = result
+            continue
+
+        total["seconds"] += result["seconds"]
+        for count in rate_metrics.values():
+            if count in result:
+                total[count] += result[count]
+
+    for rate, count in rate_metrics.items():
+        if rate in total:
+            total[rate] = total[count] / total["seconds"]
+
+    total["loops"] = loops
+    return total
+
+
+# Runs is_spanning_tree_possible() trials times from every source (every vertex if
+# sources is None) of every graph
+# The success probability of a source is the fraction of its trials that found a tree
+def benchmark_spanning_tree_trials(graphs, sources, trials):
+    prepared_graphs = [prepare_graph(G) for G in graphs]
+    success_probabilities = []
+    total_trials = 0
+
+    start_time = time.perf_counter()
+    for G in prepared_graphs:
+        broadcast_time = math.ceil(math.log2(G.number_of_nodes))
+
+        for source in sources if sources is not None else G.nodes():
+            successes = 0
+            for _ in range(trials):
+                if CheckBroadcastTime.is_spanning_tree_possible(G, source, broadcast_time):
+                    successes += 1
+
+            total_trials += trials
+            success_probabilities.append(successes / trials)
+    seconds = time.perf_counter() - start_time
+
+    return {
+        "seconds": seconds,
+        "trials": total_trials,
+        "trials_per_second": total_trials / seconds,
+        "success_probability_min": min(success_probabilities),
+        "success_probability_mean": sum(success_probabilities)
+        / len(success_probabilities),
+        "success_probability_per_source": success_probabilities,
+    }
+
+
+# Runs is_broadcast_time_bounded() once on every graph
+def benchmark_broadcast_time_bounded(graphs, max_attempts):
+    verdicts = []
+
+    start_time = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        for G in graphs:
+            broadcast_time = math.ceil(math.log2(G.number_of_nodes()))
+            verdicts.append(
+                bool(
+                    CheckBroadcastTime.is_broadcast_time_bounded(
+                        G, broadcast_time, max_attempts
+                    )
+                )
+            )
+    seconds = time.perf_counter() - start_time
+
+    return {
+        "seconds": seconds,
+        "graphs": len(graphs),
+        "graphs_per_second": len(graphs) / seconds,
+        "broadcast_graphs": sum(verdicts),
+    }
+
+
+# Builds one random graph for every row, the success probability is the fraction of
+# the constructions that gave a graph. The rate counts constructions, whether or not
+# they gave a graph
+def benchmark_create_random_graph(rows):
+    graphs = 0
+
+    start_time = time.perf_counter()
+    for row in rows:
+        if isinstance(GenerateGraph.create_random_graph(row), nx.Graph):
+            graphs += 1
+    seconds = time.perf_counter() - start_time
+
+    return {
+        "seconds": seconds,
+        "attempts": len(rows),
+        "attempts_per_second": len(rows) / seconds,
+        "success_probability": graphs / len(rows),
+    }
+
+
+# Verifies a random graph for every row that gives one on its first construction, the
+# graphs are built before the timing starts
+def benchmark_candidates(rows, max_attempts):
+    graphs = [GenerateGraph.create_random_graph(row) for row in rows]
+    graphs = [G for G in graphs if isinstance(G, nx.Graph)]
+    return benchmark_broadcast_time_bounded(graphs, max_attempts)
+
+
+def format_result(name, result):
+    text = f"{name}: {result['seconds']:.3f} seconds in {result['loops']} runs"
+    for metric in rate_metrics:
+        if metric in result:
+            text += f", {result[metric]:.1f} {metric.replace('_', ' ')}"
+
+    for metric in ("success_probability", "success_probability_mean"):
+        if metric in result:
+            text += f", {metric.replace('_', ' ')} {result[metric]:.3f}"
+
+    return text + f", peak memory {result['peak_memory_bytes'] / 1024:.0f} KiB"
+
+
+# Returns the benchmarks whose rates fell by more than tolerance (a fraction) against
+# the baseline, as (name, metric, baseline rate, rate) tuples, and prints every change
+def compare_with_baseline(results, baseline, tolerance=0.1):
+    if results["settings"] != baseline["settings"]:
+        print("Warning: the baseline was run with other settings:", baseline["settings"])
+
+    slowdowns = []
+    for name, result in results["benchmarks"].items():
+        baseline_result = baseline["benchmarks"].get(name)
+        if baseline_result is None:
+            continue
+
+        for metric in rate_metrics:
+            if metric not in result or metric not in baseline_result:
+                continue
+
+            change = result[metric] / baseline_result[metric] - 1
+            print(f"{name} {metric.replace('_', ' ')}: {change:+.1%}")
+
+            if change < -tolerance:
+                slowdowns.append((name, metric, baseline_result[metric], result[metric]))
+
+    return slowdowns
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--trials", type=int, default=200)
+    parser.add_argument("--max-attempts", type=int, default=200)
+    parser.add_argument("--candidates", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--solutions", default=None)
+    parser.add_argument("--min-seconds", type=float, default=0.5)
+    parser.add_argument("--save", default=None)
+    parser.add_argument("--baseline", default=None)
+    parser.add_argument("--tolerance", type=float, default=0.1)
+    args = parser.parse_args()
+
+    results = run_benchmarks(
+        args.seed,
+        args.trials,
+        args.max_attempts,
+        args.candidates,
+        args.repeat,
+        args.solutions,
+        args.min_seconds,
+    )
+
+    if args.save is not None:
+        with open(args.save, "w") as file:
+            json.dump(results, file, indent=2)
+
+    if args.baseline is not None:
+        with open(args.baseline, "r") as file:
+            baseline = json.load(file)
+
+        slowdowns = compare_with_baseline(results, baseline, args.tolerance)
+        if slowdowns:
+            for name, metric, baseline_rate, rate in slowdowns:
+                print(f"Slower: {name} {metric}: {baseline_rate:.1f} -> {rate:.1f}")
+            sys.exit(1)
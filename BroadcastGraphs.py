@@ -1,13 +1,24 @@
 import networkx as nx
 import matplotlib.pyplot as plt
+import argparse
 import CheckBroadcastTime
+import os
 
 
 """
 First and second graph are broadcast graphs, while the third graph is not, but we use it for testing
 """
-def main():
+# Set output to a directory to save the spanning trees of every graph to a PDF there,
+# instead of showing the graphs and their trees
+def main(output=None):
     for i in range(3):
+        if output is not None:
+            os.makedirs(output, exist_ok=True)
+            CheckBroadcastTime.show_spanning_trees(
+                graphs[i], output=os.path.join(output, "graph " + str(i) + ".pdf")
+            )
+            continue
+
         showBroacastGraph(i)
         CheckBroadcastTime.show_spanning_trees(graphs[i])
 
@@ -165,4 +176,8 @@ def showBroacastGraph(index):
 
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--output", default=None)
+    args = parser.parse_args()
+
+    main(args.output)
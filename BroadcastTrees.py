@@ -1,5 +1,6 @@
 import networkx as nx
 import matplotlib.pyplot as plt
+import argparse
 import CheckBroadcastTime
 
 
@@ -8,9 +9,13 @@ File contains all broadcast trees of 24 vertices, source vertex degree 2
 """
 
 
-def main():
+# Set output to save the spanning trees instead of showing them, see
+# RenderTrees.save_trees()
+def main(output=None):
     attempts = 0
+    spanning_trees = []
     for tree in trees:
+        prepared_tree = CheckBroadcastTime.prepare_graph(tree)
         spanning_tree = None
         while not spanning_tree:
 
@@ -18,7 +23,11 @@ def main():
                 raise ValueError("Issue with broadcast tree or algorithm, or unlucky probability")
             
             attempts += 1
-            spanning_tree = CheckBroadcastTime.generate_spanning_tree(tree, 0, 5)
+            spanning_tree = CheckBroadcastTime.generate_spanning_tree(prepared_tree, 0, 5)
+
+        if output is not None:
+            spanning_trees.append(spanning_tree)
+            continue
 
         node_colors = [
             "red" if node == 0 else "skyblue" for node in spanning_tree.nodes
@@ -37,6 +46,18 @@ def main():
 
         plt.show()
 
+    if output is not None:
+        # Imported here, so the trees can be imported without loading the drawing code
+        import RenderTrees
+
+        RenderTrees.save_trees(
+            [
+                ("tree " + str(i), spanning_tree, 0)
+                for i, spanning_tree in enumerate(spanning_trees)
+            ],
+            output,
+        )
+
     print(attempts,"attempts total,", attempts / 12,"average attempts")
 
 
@@ -116,4 +137,8 @@ def showBroadcastTree(index):
 
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--output", default=None)
+    args = parser.parse_args()
+
+    main(args.output)
@@ -3,6 +3,23 @@ import matplotlib.pyplot as plt
 from collections import deque
 import math
 import random
+import multiprocessing
+import pickle
+import numpy as np
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    ProcessPoolExecutor,
+    as_completed,
+    wait,
+)
+from PreparedGraph import prepare_graph
+import BatchedTrials
+import DistancePrefilter
+import ExactBroadcastTime
+import GraphSymmetry
+import Instrumentation
+import SourceScheduling
+from AdaptiveBudget import AdaptiveBudget
 
 
 """
@@ -13,52 +30,273 @@ spanning trees from every node
 
 # Checks if a graph is a broadcast graph by seeing if its broadcast time is bounded
 # by the minimum broadcast time
-def is_broadcast_graph(G, max_attempts=200):
-    minimum_broadcast_time = math.ceil(math.log2(G.number_of_nodes()))
+# G can be a networkx graph or a PreparedGraph
+# Pass a VerifiedGraphCache as cache to skip graphs isomorphic to one verified before,
+# the spanning trees of new broadcast graphs are stored with their verdict. A False
+# verdict that is not certain is only taken from the cache when it was found with at
+# least max_attempts
+# The other options are passed on to is_broadcast_time_bounded()
+def is_broadcast_graph(G, max_attempts=200, cache=None, **options):
+    G = prepare_graph(G)
+    minimum_broadcast_time = math.ceil(math.log2(G.number_of_nodes))
+    return_confidence = options.pop("return_confidence", False)
+
+    if cache is not None:
+        entry = cache.lookup(G, max_attempts)
+        if entry is not None and entry["broadcast_time"] == minimum_broadcast_time:
+            print("Found an isomorphic graph in the cache")
+            if return_confidence:
+                return entry["verdict"], entry["confidence"]
+            return entry["verdict"]
+
+    verdict, confidence, exact = is_broadcast_time_bounded(
+        G,
+        minimum_broadcast_time,
+        max_attempts,
+        return_confidence=True,
+        return_exact=True,
+        **options,
+    )
+
+    if cache is not None:
+        spanning_trees = None
+        if verdict:
+            spanning_trees = get_spanning_trees(
+                G,
+                max_attempts,
+                minimum_broadcast_time,
+                options.get("use_orbits", False),
+            )
+
+        # Only a verdict decided exactly is stored as certain, a confidence close
+        # enough to 1 is still a guess
+        cache.store(
+            G,
+            verdict,
+            minimum_broadcast_time,
+            spanning_trees,
+            confidence,
+            None if exact else max_attempts,
+        )
 
-    return is_broadcast_time_bounded(G, minimum_broadcast_time, max_attempts)
+    if return_confidence:
+        return verdict, confidence
+    return verdict
 
 
 # Checks if we can have a spanning tree of broadcast time at every node
 # If returns true, graph is upperbounded by that broadcast time
 # If returns false, graph may or may not be upperbounded by that broadcast time
-def is_broadcast_time_bounded(G, broadcast_time, max_attempts=200):
-    # Must be a connected graph to have a broadcast time
-    if not nx.is_connected(G):
-        return False
+# Set batch_size to run the trials of all sources together with BatchedTrials, at most
+# batch_size trials per source at a time. Pass a numpy Generator as rng to draw the
+# batched trials from it, so a run can be repeated
+# Set workers to check the sources across that many processes, the remaining sources
+# are cancelled as soon as one source fails. The processes are kept for later calls
+# with the same workers, see shutdown_workers()
+# Set exact_fallback to settle sources where every attempt failed with the exact search
+# of ExactBroadcastTime, so a returned False is certain (graphs of at most 32 vertices)
+# Set use_orbits to only check one source per orbit of the graph's automorphism group,
+# every other source of the orbit has the same result
+# Set source_order to "risk" to check the sources most likely to fail first, see
+# SourceScheduling. A SourceStatistics passed as source_statistics learns from the
+# results and is used to rank the sources of later graphs
+# Pass an AdaptiveBudget as adaptive_budget to give each source only as many of the
+# max_attempts as the success rates seen on sources with the same features call for
+# Set return_confidence to return (verdict, confidence), where the confidence of a False
+# is the probability that a source with a spanning tree would have found it in time
+# Set return_exact to also return whether the verdict was decided exactly, which a True
+# always is, and a False only when the distances or the exact search ruled it out
+def is_broadcast_time_bounded(
+    G,
+    broadcast_time,
+    max_attempts=200,
+    batch_size=None,
+    workers=None,
+    exact_fallback=False,
+    use_orbits=False,
+    source_order="label",
+    source_statistics=None,
+    adaptive_budget=None,
+    return_confidence=False,
+    rng=None,
+    return_exact=False,
+):
+    def result(verdict, confidence=1.0, exact=True):
+        values = (verdict,)
+        if return_confidence:
+            values += (confidence,)
+        if return_exact:
+            values += (exact,)
+        return values if len(values) > 1 else verdict
 
-    # Broadcast time must be greater than or equal to ceil(log2(|V|))
-    if broadcast_time < math.ceil(math.log2(G.number_of_nodes())):
-        return False
+    # Preprocessing so the tree algorithm can run propertly
+    G = prepare_graph(G)
 
-    # Broadcast time must be greater than or equal to the diameter
-    if broadcast_time < nx.diameter(G):
-        return False
+    # Every source must be able to reach enough vertices within each distance, this
+    # also rejects disconnected graphs, times below ceil(log2(|V|)) and the diameter
+    if not DistancePrefilter.satisfies_distance_bounds(G, broadcast_time):
+        return result(False)
 
-    # Preprocessing so the tree algorithm can run propertly
-    G = nx.convert_node_labels_to_integers(G)
+    sources = list(G.nodes())
+    if use_orbits:
+        sources = [orbit[0] for orbit in GraphSymmetry.get_vertex_orbits(G)]
+
+    if source_order == "risk":
+        sources = SourceScheduling.rank_sources(
+            G, sources, broadcast_time, source_statistics
+        )
+    elif source_order != "label":
+        raise ValueError('source_order must be "label" or "risk"')
 
     # Stores total attempts for the statistics after
     total_attempts = 0
 
-    for source in G.nodes:
-        allowed_attempts = 0
-        is_spanning_tree = False
+    # Estimates the success rate for the confidence even when the budget is fixed
+    success_rate_estimate = adaptive_budget
+    if success_rate_estimate is None:
+        success_rate_estimate = AdaptiveBudget()
 
-        # Tries to check if spanning tree is possible a few times for each node,
-        # if not, returns False
-        while not is_spanning_tree:
-            if allowed_attempts >= max_attempts:
-                print("Fails at node", source)
-                return False
+    features = {}
 
-            total_attempts += 1
-            allowed_attempts += 1
-            is_spanning_tree = is_spanning_tree_possible(G, source, broadcast_time)
+    def get_features(source):
+        if source not in features:
+            features[source] = SourceScheduling.get_source_features(
+                G, source, broadcast_time
+            )
+        return features[source]
+
+    def get_budget(source):
+        if adaptive_budget is None:
+            return max_attempts
+        return adaptive_budget.get_budget(max_attempts, get_features(source))
+
+    # Attempts each source was given
+    budgets = {}
+
+    if workers is not None and workers > 1:
+        budgets = {source: get_budget(source) for source in sources}
+        source_results = _check_sources_in_parallel(
+            G, sources, broadcast_time, budgets, batch_size, workers, rng
+        )
+    elif batch_size is not None:
+        budgets = {source: get_budget(source) for source in sources}
+        attempts = BatchedTrials.attempts_until_success(
+            G,
+            sources,
+            broadcast_time,
+            [budgets[source] for source in sources],
+            batch_size,
+            rng,
+            stop_at_failure=True,
+        )
+
+        # The trials stop at the first source that fails, sources left unfinished then
+        # have 0 attempts and are not recorded
+        source_results = [
+            (source, source_attempts)
+            for source, source_attempts in zip(sources, attempts)
+            if source_attempts != 0
+        ]
+    else:
+        # The budget of a source is only chosen once the sources before it are done
+        def check_sources():
+            for source in sources:
+                budgets[source] = get_budget(source)
+                yield source, get_source_attempts(
+                    G, source, broadcast_time, budgets[source], rng=rng
+                )
+
+        source_results = check_sources()
+
+    # Sources are checked lazily, so returning at the first failure skips the rest
+    for source, attempts in source_results:
+        # Failed sources are recorded too, as attempts that all failed
+        success_rate_estimate.record(
+            budgets[source] if attempts is None else attempts,
+            attempts is not None,
+            get_features(source),
+        )
+
+        # A failed source is only given up once the estimate, which now counts its
+        # failed attempts too, is confident a source with a spanning tree would have
+        # succeeded, so hard sources get up to max_attempts before a False verdict
+        while (
+            attempts is None
+            and adaptive_budget is not None
+            and budgets[source] < max_attempts
+            and adaptive_budget.get_confidence(budgets[source], get_features(source))
+            < 1 - adaptive_budget.alpha
+        ):
+            extra_budget = min(budgets[source], max_attempts - budgets[source])
+            extra_attempts = get_source_attempts(
+                G, source, broadcast_time, extra_budget, batch_size, rng
+            )
+            adaptive_budget.record(
+                extra_budget if extra_attempts is None else extra_attempts,
+                extra_attempts is not None,
+                get_features(source),
+            )
+
+            if extra_attempts is not None:
+                attempts = budgets[source] + extra_attempts
+            budgets[source] += extra_budget
+
+        if attempts is None and exact_fallback:
+            if ExactBroadcastTime.is_source_broadcast_time_bounded(
+                G, source, broadcast_time
+            ):
+                attempts = budgets[source]
+
+        if Instrumentation.enabled:
+            Instrumentation.observe(
+                "source_attempts", "failed" if attempts is None else attempts
+            )
+
+        if source_statistics is not None:
+            source_statistics.record(get_features(source), attempts is None)
+
+        if attempts is None:
+            if exact_fallback:
+                print("Fails at node", source, "(exact)")
+                return result(False)
+
+            print("Fails at node", source)
+
+            # The confidence is the posterior of the failed source's own features,
+            # which already counts the attempts it failed
+            return result(
+                False,
+                success_rate_estimate.get_confidence(
+                    budgets[source], get_features(source)
+                ),
+                exact=False,
+            )
+
+        total_attempts += attempts
 
     # Returns True if sucessfully creates spanning tree for each node
-    print("Average attempts per source: ", total_attempts / G.number_of_nodes())
-    return True
+    print("Average attempts per source: ", total_attempts / len(sources))
+    return result(True)
+
+
+# Tries to check if spanning tree is possible a few times for a source
+# Returns the number of attempts it took, or None if every attempt failed
+# rng is the numpy Generator of the batched trials, see is_broadcast_time_bounded()
+def get_source_attempts(
+    G, source, broadcast_time, max_attempts=200, batch_size=None, rng=None
+):
+    G = prepare_graph(G)
+
+    if batch_size is not None:
+        return BatchedTrials.attempts_until_success(
+            G, [source], broadcast_time, max_attempts, batch_size, rng
+        )[0]
+
+    for attempts in range(1, max_attempts + 1):
+        if is_spanning_tree_possible(G, source, broadcast_time):
+            return attempts
+
+    return None
 
 
 # Returns the approximate broadcast time of a graph
@@ -66,26 +304,29 @@ def is_broadcast_time_bounded(G, broadcast_time, max_attempts=200):
 # where the actual broadcast time may be lower
 # Use the lower_bound to skip times < t if graph is known to be lowerbounded by
 # a certain time t
-def get_broadcast_time(G, max_attempts=200, lower_bound=0):
-    # Must be a connected graph for there to be a broadcast time
-    if not nx.is_connected(G):
+# Set workers to search the sources across that many processes, kept like the ones of
+# is_broadcast_time_bounded()
+def get_broadcast_time(G, max_attempts=200, lower_bound=0, workers=None):
+    # Preprocessing so the tree algorithm can run propertly
+    G = prepare_graph(G)
+
+    # Lowest broadcast time the distances of the graph allow, None if it is not
+    # connected, since then there is no broadcast time
+    distance_bound = DistancePrefilter.get_broadcast_time_lower_bound(G)
+    if distance_bound is None:
         return None
 
     # We can skip the algorithm in this case
-    if lower_bound >= G.number_of_nodes() - 1:
-        return G.number_of_nodes() - 1
-
-    # Lower bounds on the broadcast time of any graph
-    minimum_broadcast_time = math.ceil(math.log2(G.number_of_nodes()))
-    diameter = nx.diameter(G)
+    if lower_bound >= G.number_of_nodes - 1:
+        return G.number_of_nodes - 1
 
     # Starts searching at the lowest broadcast time possible for the graph
-    broadcast_time = max(minimum_broadcast_time, diameter, lower_bound)
+    broadcast_time = max(distance_bound, lower_bound)
 
-    # Preprocessing so the tree algorithm can run propertly
-    G = nx.convert_node_labels_to_integers(G)
+    if workers is not None and workers > 1:
+        return _get_broadcast_time_in_parallel(G, broadcast_time, max_attempts, workers)
 
-    for source in G.nodes:
+    for source in G.nodes():
         allowed_attempts = 0
         is_spanning_tree = False
 
@@ -97,8 +338,8 @@ def get_broadcast_time(G, max_attempts=200, lower_bound=0):
                 broadcast_time += 1
 
                 # Max possible broadcast time for any connected graph
-                if broadcast_time >= G.number_of_nodes() - 1:
-                    return G.number_of_nodes() - 1
+                if broadcast_time >= G.number_of_nodes - 1:
+                    return G.number_of_nodes - 1
 
             allowed_attempts += 1
             is_spanning_tree = is_spanning_tree_possible(G, source, broadcast_time)
@@ -106,77 +347,361 @@ def get_broadcast_time(G, max_attempts=200, lower_bound=0):
     return broadcast_time
 
 
+# Returns the exact broadcast time of a graph of at most 32 vertices, unlike
+# get_broadcast_time() this is not an upperbound but the broadcast time itself
+def get_exact_broadcast_time(G, lower_bound=0):
+    G = prepare_graph(G)
+
+    if not nx.is_connected(G.graph):
+        return None
+
+    broadcast_time = lower_bound
+    for source in G.nodes():
+        broadcast_time = ExactBroadcastTime.get_source_broadcast_time(
+            G, source, broadcast_time
+        )
+
+    return broadcast_time
+
+
+# Pool of worker processes shared by the parallel checks. It is created on first use
+# and kept for later graphs, so the workers are only started once per run
+_executor = None
+_executor_workers = None
+_shared_stop_index = None
+_shared_broadcast_time = None
+
+# Counts the graphs sent to the pool, a worker only loads a graph it has not seen last
+_graph_count = 0
+
+
+# Returns the pool of worker processes, creating it again if workers changed
+def _get_executor(workers):
+    global _executor
+    global _executor_workers
+    global _shared_stop_index
+    global _shared_broadcast_time
+
+    if _executor is None or _executor_workers != workers:
+        shutdown_workers()
+
+        _shared_stop_index = multiprocessing.Value("i", 0)
+        _shared_broadcast_time = multiprocessing.Value("i", 0)
+        _executor = ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_worker,
+            initargs=(_shared_stop_index, _shared_broadcast_time),
+        )
+        _executor_workers = workers
+
+    return _executor
+
+
+# Shuts down the pool of the parallel checks, the next parallel check starts a new one
+def shutdown_workers():
+    global _executor
+
+    if _executor is not None:
+        _executor.shutdown(wait=True, cancel_futures=True)
+        _executor = None
+
+
+# Pickles G once for the tasks of a parallel check, with a number telling the workers
+# whether it is the graph they loaded last
+def _get_graph_data(G):
+    global _graph_count
+
+    _graph_count += 1
+    return _graph_count, pickle.dumps(G.graph)
+
+
+# State of a worker process used by the parallel checks
+_worker_graph = None
+_worker_graph_id = None
+_worker_stop_index = None
+_worker_broadcast_time = None
+
+
+def _init_worker(stop_index, shared_broadcast_time):
+    global _worker_stop_index
+    global _worker_broadcast_time
+
+    _worker_stop_index = stop_index
+    _worker_broadcast_time = shared_broadcast_time
+
+    # Forked workers would otherwise all draw the same random trials
+    random.seed()
+
+
+# Returns the graph of a task, only preparing it again when the task is for a new graph
+def _load_worker_graph(graph_data):
+    global _worker_graph
+    global _worker_graph_id
+
+    graph_id, pickled_graph = graph_data
+    if graph_id != _worker_graph_id:
+        _worker_graph = prepare_graph(pickle.loads(pickled_graph))
+        _worker_graph_id = graph_id
+
+    return _worker_graph
+
+
+# Same as get_source_attempts() for the source at index in the order of the sources,
+# but gives up once a source before it has failed, returning 0
+# A source given a seed draws its trials from streams seeded with it, so its attempts do
+# not depend on the worker that checks it
+def _worker_source_attempts(
+    graph_data, index, source, broadcast_time, max_attempts, batch_size, seed=None
+):
+    if _worker_stop_index.value < index:
+        return 0
+
+    G = _load_worker_graph(graph_data)
+
+    rng = None
+    if seed is not None:
+        random.seed(seed)
+        rng = np.random.default_rng(seed)
+
+    if batch_size is not None:
+        return get_source_attempts(
+            G, source, broadcast_time, max_attempts, batch_size, rng
+        )
+
+    for attempts in range(1, max_attempts + 1):
+        if _worker_stop_index.value < index:
+            return 0
+
+        if is_spanning_tree_possible(G, source, broadcast_time):
+            return attempts
+
+    return None
+
+
+# Yields (source, attempts) pairs in the order of the sources, like the serial checks,
+# so what the caller records does not depend on the order the workers finish in
+# Sources after a failed one give up, and are only checked again if the caller goes on
+# past the failed source. Once the caller stops reading, the remaining sources are
+# cancelled
+# budgets maps every source to its number of attempts, with rng every source gets a
+# seed drawn from it
+def _check_sources_in_parallel(
+    G, sources, broadcast_time, budgets, batch_size, workers, rng=None
+):
+    executor = _get_executor(workers)
+    graph_data = _get_graph_data(G)
+
+    # Sources after this index give up
+    _shared_stop_index.value = len(sources)
+
+    seeds = [None] * len(sources)
+    if rng is not None:
+        seeds = rng.integers(2**63, size=len(sources)).tolist()
+
+    def submit(index):
+        return executor.submit(
+            _worker_source_attempts,
+            graph_data,
+            index,
+            sources[index],
+            broadcast_time,
+            budgets[sources[index]],
+            batch_size,
+            seeds[index],
+        )
+
+    futures = {}
+    try:
+        futures = {submit(index): index for index in range(len(sources))}
+        results = {}
+        failed = set()
+        next_index = 0
+
+        while next_index < len(sources):
+            if next_index not in results:
+                done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                for future in done:
+                    index = futures.pop(future)
+                    results[index] = future.result()
+                    if results[index] is None:
+                        failed.add(index)
+                        _shared_stop_index.value = min(failed)
+                continue
+
+            attempts = results.pop(next_index)
+            if attempts == 0:
+                futures[submit(next_index)] = next_index
+                continue
+
+            yield sources[next_index], attempts
+
+            # The caller went on, so a failed source was settled by the caller
+            failed.discard(next_index)
+            _shared_stop_index.value = min(failed, default=len(sources))
+            next_index += 1
+    finally:
+        # The pool is kept, so only this check's tasks are stopped
+        _shared_stop_index.value = -1
+        for future in futures:
+            future.cancel()
+        wait(futures)
+
+
+# Finds the broadcast time needed from a source, starting at the largest broadcast
+# time any worker has needed so far, since the graph needs at least that much
+def _worker_source_broadcast_time(graph_data, source, max_attempts):
+    G = _load_worker_graph(graph_data)
+    number_of_nodes = G.number_of_nodes
+
+    with _worker_broadcast_time.get_lock():
+        broadcast_time = _worker_broadcast_time.value
+
+    allowed_attempts = 0
+
+    while broadcast_time < number_of_nodes - 1:
+        if allowed_attempts >= max_attempts:
+            allowed_attempts = 0
+            broadcast_time += 1
+
+            with _worker_broadcast_time.get_lock():
+                _worker_broadcast_time.value = max(
+                    _worker_broadcast_time.value, broadcast_time
+                )
+            continue
+
+        # Another worker needed a larger broadcast time, so skip ahead to it
+        if _worker_broadcast_time.value > broadcast_time:
+            allowed_attempts = 0
+            broadcast_time = _worker_broadcast_time.value
+            continue
+
+        allowed_attempts += 1
+        if is_spanning_tree_possible(G, source, broadcast_time):
+            return broadcast_time
+
+    return number_of_nodes - 1
+
+
+def _get_broadcast_time_in_parallel(G, broadcast_time, max_attempts, workers):
+    executor = _get_executor(workers)
+    graph_data = _get_graph_data(G)
+    _shared_broadcast_time.value = broadcast_time
+
+    futures = [
+        executor.submit(_worker_source_broadcast_time, graph_data, source, max_attempts)
+        for source in G.nodes()
+    ]
+
+    try:
+        for future in as_completed(futures):
+            broadcast_time = max(broadcast_time, future.result())
+
+            # Max possible broadcast time for any connected graph
+            if broadcast_time >= G.number_of_nodes - 1:
+                return G.number_of_nodes - 1
+    finally:
+        # Workers still checking a source skip ahead to the largest time and return
+        with _shared_broadcast_time.get_lock():
+            _shared_broadcast_time.value = G.number_of_nodes - 1
+        for future in futures:
+            future.cancel()
+        wait(futures)
+
+    return broadcast_time
+
+
 # Newest Version
 # Checks if we can create a spanning tree of broadcast_time from a source in G
+# G can be a networkx graph or a PreparedGraph, prepare it once when calling this in a loop
 def is_spanning_tree_possible(G, source, broadcast_time):
+    G = prepare_graph(G)
+    neighbors = G.neighbors
+
     # Places all nodes visted in a queue
     queue = deque([source])
 
     # Stored which nodes are visited
-    visited = [False] * G.number_of_nodes()
+    visited = [False] * G.number_of_nodes
     visited[source] = True
+    visited_count = 1
 
     # stores the number of children needed for each node to fulfill a broadcast spanning tree.
-    expected_children = [0] * G.number_of_nodes()
+    expected_children = [0] * G.number_of_nodes
     # The expected broadcast time for tree will be the number of branches of the source.
     expected_children[source] = broadcast_time
 
     # Preprocessing as the source is already visited.
     # Reduces the degree of the source's neighbours, since we work with the available degree.
-    remaining_degree = [degree for node, degree in G.degree]
-    for source_neighbor in G.neighbors(source):
+    remaining_degree = G.degree[:]
+    for source_neighbor in neighbors[source]:
         remaining_degree[source_neighbor] -= 1
 
     while queue:
         current_node = queue.popleft()
 
         unvisited_neighbors = [
-            neighbor for neighbor in G.neighbors(current_node) if not visited[neighbor]
+            neighbor for neighbor in neighbors[current_node] if not visited[neighbor]
         ]
         random.shuffle(unvisited_neighbors)
 
-        sorted_neighbors = sorted(
-            unvisited_neighbors, key=lambda x: remaining_degree[x], reverse=True
-        )
+        unvisited_neighbors.sort(key=remaining_degree.__getitem__, reverse=True)
 
-        for neighbor in sorted_neighbors:
-            if expected_children[current_node] <= 0:
+        children = expected_children[current_node]
+        for neighbor in unvisited_neighbors:
+            if children <= 0:
                 break
 
-            expected_children[current_node] -= 1
-            expected_children[neighbor] = expected_children[current_node]
+            children -= 1
+            expected_children[neighbor] = children
             visited[neighbor] = True
+            visited_count += 1
             queue.append(neighbor)
 
-            for second_neighbor in G.neighbors(neighbor):
+            for second_neighbor in neighbors[neighbor]:
                 remaining_degree[second_neighbor] -= 1
 
     # Checks if every node was visited
-    return visited.count(False) == 0
+    spanning_tree_found = visited_count == G.number_of_nodes
+
+    # A failed trial is counted at the smallest distance from the source of a vertex it
+    # did not reach
+    if Instrumentation.enabled:
+        Instrumentation.count("trials")
+        if not spanning_tree_found:
+            distances = DistancePrefilter.get_distance_matrix(G)[source]
+            Instrumentation.observe(
+                "failure_depth",
+                int(min(distances[node] for node in G.nodes() if not visited[node])),
+            )
+
+    return spanning_tree_found
 
 
 # Shows all spanning tree of graph of broadcast_time
-def show_spanning_trees(G, max_attempts=200, broadcast_time=None):
-    G = nx.convert_node_labels_to_integers(G)
+# Set use_orbits to only search trees for one source per orbit of the graph's
+# automorphism group, the trees of the other sources are mapped from it
+# Set output to save the trees instead of showing them, see RenderTrees.save_trees()
+def show_spanning_trees(
+    G, max_attempts=200, broadcast_time=None, use_orbits=False, output=None
+):
+    spanning_trees = get_spanning_trees(G, max_attempts, broadcast_time, use_orbits)
     failed_nodes = 0
 
-    # Defualt value
-    if broadcast_time == None:
-        broadcast_time = math.ceil(math.log2(G.number_of_nodes()))
+    if output is not None:
+        # Imported here, so verifying graphs does not load the drawing code
+        import RenderTrees
 
-    for source in G.nodes:
-        allowed_attempts = 0
-        spanning_tree = None
-
-        while not spanning_tree and allowed_attempts < max_attempts:
-            allowed_attempts -= 1
-            spanning_tree = generate_spanning_tree(G, source, broadcast_time)
+        RenderTrees.save_trees(RenderTrees.get_tree_items(spanning_trees), output)
 
+    for source, spanning_tree in spanning_trees.items():
         if not spanning_tree:
             failed_nodes += 1
             print("No broadcast spanning tree found at node", source)
             continue
 
+        if output is not None:
+            continue
+
         node_colors = [
             "red" if node == source else "skyblue" for node in spanning_tree.nodes
         ]
@@ -200,51 +725,90 @@ def show_spanning_trees(G, max_attempts=200, broadcast_time=None):
         print("Found a spanning tree for every node")
 
 
+# Returns a dictionary of the broadcast spanning tree found for every source, or None
+# for the sources where max_attempts attempts did not find one
+def get_spanning_trees(G, max_attempts=200, broadcast_time=None, use_orbits=False):
+    G = prepare_graph(G)
+
+    # Defualt value
+    if broadcast_time == None:
+        broadcast_time = math.ceil(math.log2(G.number_of_nodes))
+
+    if use_orbits:
+        orbit_representatives = GraphSymmetry.get_orbit_representatives(G)
+
+    spanning_trees = {}
+
+    for source in G.nodes():
+        allowed_attempts = 0
+        spanning_tree = None
+
+        if use_orbits and orbit_representatives[source] != source:
+            representative = orbit_representatives[source]
+            spanning_tree = spanning_trees[representative]
+
+            if spanning_tree:
+                automorphism = GraphSymmetry.find_automorphism(G, representative, source)
+                spanning_tree = nx.relabel_nodes(spanning_tree, automorphism)
+        else:
+            while not spanning_tree and allowed_attempts < max_attempts:
+                allowed_attempts += 1
+                spanning_tree = generate_spanning_tree(G, source, broadcast_time)
+
+        spanning_trees[source] = spanning_tree
+
+    return spanning_trees
+
+
 # Same logic as is_spanning_tree_possible(), but returns the broadcast spanning tree if it is found
 def generate_spanning_tree(G, source, broadcast_time):
+    G = prepare_graph(G)
+    neighbors = G.neighbors
+
     # creates a tree
     Tree = nx.Graph()
 
     queue = deque([source])
 
-    visited = [False] * G.number_of_nodes()
+    visited = [False] * G.number_of_nodes
     visited[source] = True
+    visited_count = 1
 
-    expected_children = [0] * G.number_of_nodes()
+    expected_children = [0] * G.number_of_nodes
     expected_children[source] = broadcast_time
 
-    remaining_degree = [degree for node, degree in G.degree]
-    for source_neighbor in G.neighbors(source):
+    remaining_degree = G.degree[:]
+    for source_neighbor in neighbors[source]:
         remaining_degree[source_neighbor] -= 1
 
     while queue:
         current_node = queue.popleft()
 
         unvisited_neighbors = [
-            neighbor for neighbor in G.neighbors(current_node) if not visited[neighbor]
+            neighbor for neighbor in neighbors[current_node] if not visited[neighbor]
         ]
         random.shuffle(unvisited_neighbors)
-        sorted_neighbors = sorted(
-            unvisited_neighbors, key=lambda x: remaining_degree[x], reverse=True
-        )
+        unvisited_neighbors.sort(key=remaining_degree.__getitem__, reverse=True)
 
-        for neighbor in sorted_neighbors:
-            if expected_children[current_node] <= 0:
+        children = expected_children[current_node]
+        for neighbor in unvisited_neighbors:
+            if children <= 0:
                 break
 
             # Adds edge for each visited vertex
             Tree.add_edge(current_node, neighbor)
 
-            expected_children[current_node] -= 1
-            expected_children[neighbor] = expected_children[current_node]
+            children -= 1
+            expected_children[neighbor] = children
             visited[neighbor] = True
+            visited_count += 1
             queue.append(neighbor)
 
-            for second_neighbor in G.neighbors(neighbor):
+            for second_neighbor in neighbors[neighbor]:
                 remaining_degree[second_neighbor] -= 1
 
     # Returns the spanning tree if every vertex is visited
-    if visited.count(False) == 0:
+    if visited_count == G.number_of_nodes:
         return Tree
 
     return None
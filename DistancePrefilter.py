@@ -0,0 +1,87 @@
+import math
+import numpy as np
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import shortest_path
+from PreparedGraph import prepare_graph
+
+
+"""
+Rejects graphs that can not reach a broadcast time from their distances alone, for all
+sources at once, before any spanning tree is tried
+"""
+
+
+# distances[u][v] is the distance between u and v, or inf if they are not connected
+def get_distance_matrix(G):
+    G = prepare_graph(G)
+
+    if "distance_matrix" not in G.cache:
+        n = G.number_of_nodes
+        adjacency = csr_matrix(
+            (np.ones(len(G.flat_neighbors)), G.flat_neighbors, G.offsets), shape=(n, n)
+        )
+        G.cache["distance_matrix"] = shortest_path(
+            adjacency, directed=False, unweighted=True
+        )
+
+    return G.cache["distance_matrix"]
+
+
+# within_distance[v][d] is the number of vertices within distance d of v,
+# for d from 0 to max_distance
+def get_within_distance_counts(G, max_distance):
+    distances = get_distance_matrix(G)
+    return np.stack(
+        [np.count_nonzero(distances <= d, axis=1) for d in range(max_distance + 1)],
+        axis=1,
+    )
+
+
+# Returns the sources that can not inform every vertex within broadcast_time rounds
+# Informed vertices at most double every round, and after r rounds they are all within
+# distance r of the source, so at most min(2 * U(r - 1), N(r)) vertices are informed
+# after r rounds, where N(r) counts the vertices within distance r.
+# This also covers the ceil(log2(|V|)), connectivity and eccentricity bounds
+def get_failing_sources(G, broadcast_time):
+    G = prepare_graph(G)
+    n = G.number_of_nodes
+
+    if broadcast_time < 0:
+        return np.arange(n)
+
+    within_distance = get_within_distance_counts(G, broadcast_time)
+
+    informed_bound = np.ones(n, dtype=np.int64)
+    for rounds in range(1, broadcast_time + 1):
+        informed_bound = np.minimum(2 * informed_bound, within_distance[:, rounds])
+
+    return np.flatnonzero(informed_bound < n)
+
+
+# Checks the bound of get_failing_sources() for every source of G
+def satisfies_distance_bounds(G, broadcast_time):
+    G = prepare_graph(G)
+
+    # Cheaper than the distances, no broadcast is faster than doubling every round
+    if broadcast_time < math.ceil(math.log2(G.number_of_nodes)):
+        return False
+
+    return len(get_failing_sources(G, broadcast_time)) == 0
+
+
+# Returns the smallest broadcast time that passes satisfies_distance_bounds(), or None
+# if G is not connected
+def get_broadcast_time_lower_bound(G, lower_bound=0):
+    G = prepare_graph(G)
+    distances = get_distance_matrix(G)
+
+    if np.isinf(distances).any():
+        return None
+
+    broadcast_time = max(
+        math.ceil(math.log2(G.number_of_nodes)), int(distances.max()), lower_bound
+    )
+    while not satisfies_distance_bounds(G, broadcast_time):
+        broadcast_time += 1
+
+    return broadcast_time
@@ -0,0 +1,211 @@
+import math
+from PreparedGraph import prepare_graph
+
+
+"""
+Exact broadcast time of a source, found by searching over the sets of informed vertices.
+Unlike is_spanning_tree_possible(), a False from this search means no broadcast
+scheme of that time exists
+"""
+
+
+# The informed sets are stored as bitmasks, the search is only practical for small graphs
+max_nodes = 32
+
+
+# Checks if the source can inform every vertex of G within broadcast_time rounds,
+# where every informed vertex can inform one uninformed neighbour per round
+def is_source_broadcast_time_bounded(G, source, broadcast_time):
+    G = prepare_graph(G)
+    neighbor_masks = get_neighbor_masks(G)
+
+    search = _BroadcastSearch(neighbor_masks, G.number_of_nodes)
+    return search.can_finish(1 << source, broadcast_time)
+
+
+# Returns the exact broadcast time of the source in G, or None if G is not connected
+def get_source_broadcast_time(G, source, lower_bound=0):
+    G = prepare_graph(G)
+    n = G.number_of_nodes
+    neighbor_masks = get_neighbor_masks(G)
+
+    eccentricity = _get_eccentricity(neighbor_masks, n, source)
+    if eccentricity is None:
+        return None
+
+    # A broadcast can at most double the informed vertices each round, and needs at
+    # least as many rounds as the furthest vertex is away
+    broadcast_time = max(math.ceil(math.log2(n)), eccentricity, lower_bound)
+
+    search = _BroadcastSearch(neighbor_masks, n)
+    while not search.can_finish(1 << source, broadcast_time):
+        broadcast_time += 1
+
+    return broadcast_time
+
+
+# neighbor_masks[v] has bit u set for every neighbour u of v
+def get_neighbor_masks(G):
+    G = prepare_graph(G)
+
+    if G.number_of_nodes > max_nodes:
+        raise ValueError(
+            "Exact broadcast time is only supported for graphs with at most "
+            + str(max_nodes)
+            + " vertices"
+        )
+
+    if "neighbor_masks" not in G.cache:
+        neighbor_masks = []
+        for node_neighbors in G.neighbors:
+            mask = 0
+            for neighbor in node_neighbors:
+                mask |= 1 << neighbor
+            neighbor_masks.append(mask)
+
+        G.cache["neighbor_masks"] = neighbor_masks
+
+    return G.cache["neighbor_masks"]
+
+
+def _get_eccentricity(neighbor_masks, n, source):
+    full_mask = (1 << n) - 1
+    reached = 1 << source
+    distance = 0
+
+    while reached != full_mask:
+        expanded = _expand(neighbor_masks, reached)
+        if expanded == reached:
+            return None
+
+        reached = expanded
+        distance += 1
+
+    return distance
+
+
+# Adds every neighbour of the vertices in mask to mask
+def _expand(neighbor_masks, mask):
+    expanded = mask
+    remaining = mask
+    while remaining:
+        low_bit = remaining & -remaining
+        expanded |= neighbor_masks[low_bit.bit_length() - 1]
+        remaining ^= low_bit
+
+    return expanded
+
+
+def _bits(mask):
+    while mask:
+        low_bit = mask & -mask
+        yield low_bit.bit_length() - 1
+        mask ^= low_bit
+
+
+# Depth first search over (informed set, rounds left) states
+class _BroadcastSearch:
+    def __init__(self, neighbor_masks, n):
+        self.neighbor_masks = neighbor_masks
+        self.n = n
+        self.full_mask = (1 << n) - 1
+
+        # failed[rounds] holds the informed sets known to not finish in that many rounds
+        self.failed = {}
+
+    def can_finish(self, informed, rounds):
+        if informed == self.full_mask:
+            return True
+
+        if rounds <= 0 or self._is_below_lower_bound(informed, rounds):
+            return False
+
+        failed = self.failed.setdefault(rounds, set())
+        if informed in failed:
+            return False
+
+        # In the last round every uninformed vertex needs its own informed neighbour
+        if rounds == 1:
+            finished = self._has_covering_matching(informed)
+        else:
+            finished = any(
+                self.can_finish(informed | newly_informed, rounds - 1)
+                for newly_informed in self._get_next_rounds(informed)
+            )
+
+        if not finished:
+            failed.add(informed)
+
+        return finished
+
+    # At most twice as many vertices are informed after each round, and only the
+    # vertices within distance k of the informed set can be informed after k rounds
+    def _is_below_lower_bound(self, informed, rounds):
+        informed_bound = bin(informed).count("1")
+        reachable = informed
+
+        for _ in range(rounds):
+            reachable = _expand(self.neighbor_masks, reachable)
+            informed_bound = min(2 * informed_bound, bin(reachable).count("1"))
+
+        return informed_bound < self.n
+
+    def _has_covering_matching(self, informed):
+        matched_to = {}
+
+        def augment(uninformed_vertex, seen):
+            candidates = self.neighbor_masks[uninformed_vertex] & informed & ~seen[0]
+            for sender in _bits(candidates):
+                seen[0] |= 1 << sender
+                if sender not in matched_to or augment(matched_to[sender], seen):
+                    matched_to[sender] = uninformed_vertex
+                    return True
+
+            return False
+
+        for uninformed_vertex in _bits(self.full_mask & ~informed):
+            if not augment(uninformed_vertex, [0]):
+                return False
+
+        return True
+
+    # Returns the sets of vertices that can be informed in the next round
+    # Only maximal sets are returned, since informing a superset is never worse
+    def _get_next_rounds(self, informed):
+        uninformed = self.full_mask & ~informed
+        senders = [
+            (vertex, self.neighbor_masks[vertex] & uninformed)
+            for vertex in _bits(informed)
+            if self.neighbor_masks[vertex] & uninformed
+        ]
+        # Vertices with the fewest options first keeps the search tree narrow
+        senders.sort(key=lambda sender: bin(sender[1]).count("1"))
+
+        next_rounds = set()
+
+        def choose(index, taken, idle_options):
+            if index == len(senders):
+                # A sender may only stay idle if all of its options were taken
+                if (idle_options & ~taken) == 0:
+                    next_rounds.add(taken)
+                return
+
+            options = senders[index][1]
+            for receiver in _bits(options & ~taken):
+                choose(index + 1, taken | (1 << receiver), idle_options)
+
+            choose(index + 1, taken, idle_options | options)
+
+        choose(0, 0, 0)
+
+        # Drops every set contained in a larger one, largest sets are tried first
+        maximal_rounds = []
+        for newly_informed in sorted(
+            next_rounds, key=lambda mask: bin(mask).count("1"), reverse=True
+        ):
+            if not any(
+                (newly_informed & kept) == newly_informed for kept in maximal_rounds
+            ):
+                maximal_rounds.append(newly_informed)
+
+        return maximal_rounds
@@ -0,0 +1,278 @@
+import networkx as nx
+import numpy as np
+import time
+from scipy.optimize import Bounds, LinearConstraint, milp
+from scipy.sparse import coo_matrix
+
+
+"""
+Builds a graph for a row of the integer solutions with a 0/1 program, instead of random
+constructions. Either a graph is found or the program shows no graph exists for the row
+"""
+
+
+# Vertex classes in the order of a row, v5 and v6plus vertices share the 5plus edge classes
+vertex_classes = ["2", "3", "4", "5", "6plus"]
+
+# Error returned when the search gives up before deciding the row
+search_stopped_error = (
+    "Exact search stopped before finding a graph or showing there is none"
+)
+
+# Edge classes of a row from index 6 on, as the pair of vertex classes they join
+edge_classes = [
+    ("2", "3"),
+    ("2", "4"),
+    ("2", "5plus"),
+    ("3", "3"),
+    ("3", "4"),
+    ("3", "5plus"),
+    ("4", "4"),
+    ("4", "5plus"),
+    ("5plus", "5plus"),
+]
+
+
+# Returns a graph realizing the row, in the same format as
+# GenerateGraph.create_random_graph(), or an error string
+# A graph realizes the row if it has the vertex and edge class counts of the row, the
+# given number of edges, max degree delta with every v6plus vertex of degree 6 to delta,
+# and if every v2 vertex joined to a v3 vertex is also joined to a v5plus vertex that is
+# not adjacent to that v3 vertex, like the graphs create_random_graph() builds.
+# The graph must also be connected with diameter <= 5. These are added to the program
+# whenever a solution breaks them, as cuts for connectivity and as a path of length
+# <= 5 for a vertex pair that is too far apart. The search gives up after max_solves
+# solves or time_limit seconds
+def create_exact_graph(values, edges=35, max_solves=50, time_limit=10):
+    if len(values) != 15:
+        raise ValueError("Array must have exactly 15 elements")
+
+    v6plus, max_degree = values[4], values[5]
+
+    classes = []
+    for class_name, count in zip(vertex_classes, values[:5]):
+        classes.extend([class_name] * count)
+    n = len(classes)
+
+    if v6plus == 0 and max_degree != max(
+        vertex_classes.index(class_name) + 2 for class_name in set(classes)
+    ):
+        return "No vertex of max degree found"
+
+    def edge_class(index_i, index_j):
+        names = sorted(
+            "5plus" if classes[index] in ("5", "6plus") else classes[index]
+            for index in (index_i, index_j)
+        )
+        return tuple(names)
+
+    # One 0/1 variable per pair of vertices some edge class may join
+    pairs = [
+        (index_i, index_j)
+        for index_i in range(n)
+        for index_j in range(index_i + 1, n)
+        if edge_class(index_i, index_j) in edge_classes
+    ]
+    variables = {pair: position for position, pair in enumerate(pairs)}
+
+    def variable(index_i, index_j):
+        return variables.get((min(index_i, index_j), max(index_i, index_j)))
+
+    rows = []
+
+    def add_row(coefficients, lower, upper):
+        rows.append((coefficients, lower, upper))
+
+    # Total edges and edge class counts
+    add_row({position: 1 for position in range(len(pairs))}, edges, edges)
+    for pair_class, count in zip(edge_classes, values[6:]):
+        add_row(
+            {
+                position: 1
+                for position, pair in enumerate(pairs)
+                if edge_class(*pair) == pair_class
+            },
+            count,
+            count,
+        )
+
+    # Degrees, the first v6plus vertex has the max degree since they are interchangeable
+    first_v6plus = classes.index("6plus") if v6plus > 0 else None
+    for vertex in range(n):
+        incident = {
+            variable(vertex, other): 1
+            for other in range(n)
+            if variable(vertex, other) is not None
+        }
+
+        if classes[vertex] != "6plus":
+            degree = vertex_classes.index(classes[vertex]) + 2
+            add_row(incident, degree, degree)
+        elif vertex == first_v6plus:
+            add_row(incident, max_degree, max_degree)
+        else:
+            add_row(incident, 6, max_degree)
+
+    # v3 neighbours of a v2 vertex are matched by v5plus neighbours, without a triangle
+    v3_vertices = [vertex for vertex in range(n) if classes[vertex] == "3"]
+    v5plus_vertices = [
+        vertex for vertex in range(n) if classes[vertex] in ("5", "6plus")
+    ]
+    for vertex in range(n):
+        if classes[vertex] != "2":
+            continue
+
+        coefficients = {variable(vertex, other): 1 for other in v3_vertices}
+        for other in v5plus_vertices:
+            coefficients[variable(vertex, other)] = -1
+        add_row(coefficients, -np.inf, 0)
+
+        for index_i in v3_vertices:
+            for index_j in v5plus_vertices:
+                add_row(
+                    {
+                        variable(vertex, index_i): 1,
+                        variable(vertex, index_j): 1,
+                        variable(index_i, index_j): 1,
+                    },
+                    -np.inf,
+                    2,
+                )
+
+    # Edge variables are 0/1, the path flows added below are continuous
+    integrality = [1] * len(pairs)
+
+    # Requires a path of length <= 5 from u to v, as one unit of flow from u to v along
+    # the edges, using at most 5 edges in total. Any flow like that contains such a path
+    def add_short_path(u, v):
+        flows = {}
+        for position, (index_i, index_j) in enumerate(pairs):
+            flows[index_i, index_j] = len(integrality)
+            flows[index_j, index_i] = len(integrality) + 1
+            integrality.extend([0, 0])
+            add_row(
+                {
+                    flows[index_i, index_j]: 1,
+                    flows[index_j, index_i]: 1,
+                    position: -1,
+                },
+                -np.inf,
+                0,
+            )
+
+        for vertex in range(n):
+            balance = {}
+            for (tail, head), flow in flows.items():
+                if tail == vertex:
+                    balance[flow] = 1
+                elif head == vertex:
+                    balance[flow] = -1
+
+            supply = 1 if vertex == u else -1 if vertex == v else 0
+            add_row(balance, supply, supply)
+
+        add_row({flow: 1 for flow in flows.values()}, -np.inf, 5)
+
+    start_time = time.time()
+    for _ in range(max_solves):
+        remaining_time = time_limit - (time.time() - start_time)
+        if remaining_time <= 0:
+            break
+
+        solution = _solve(rows, integrality, remaining_time)
+        if solution is None:
+            return "No graph realizes the row"
+
+        if solution is False:
+            break
+
+        G = nx.Graph()
+        G.add_nodes_from(range(n))
+        G.add_edges_from(
+            pair for position, pair in enumerate(pairs) if solution[position] > 0.5
+        )
+
+        if not nx.is_connected(G):
+            # Some edge has to leave every component
+            for component in nx.connected_components(G):
+                add_row(
+                    {
+                        variables[pair]: 1
+                        for pair in pairs
+                        if (pair[0] in component) != (pair[1] in component)
+                    },
+                    1,
+                    np.inf,
+                )
+            continue
+
+        distances = dict(nx.all_pairs_shortest_path_length(G))
+        far_pairs = [
+            (u, v) for u in range(n) for v in range(u + 1, n) if distances[u][v] > 5
+        ]
+        if far_pairs:
+            # A path of length <= 5 from u to v in another graph has to leave the edges
+            # of G through a new edge starting within distance 4 of u. These cuts prune
+            # many graphs at once, while the exact path constraint is only added for one
+            # pair since it grows the program much more
+            for u in set(vertex for far_pair in far_pairs for vertex in far_pair):
+                add_row(
+                    {
+                        variables[pair]: 1
+                        for pair in pairs
+                        if not G.has_edge(*pair)
+                        and min(distances[u][pair[0]], distances[u][pair[1]]) <= 4
+                    },
+                    1,
+                    np.inf,
+                )
+
+            add_short_path(*far_pairs[0])
+            continue
+
+        return G
+
+    return search_stopped_error
+
+
+# Returns the values of a feasible solution, None if there is none, or False if the
+# solver ran out of time before knowing
+def _solve(rows, integrality, time_limit):
+    number_of_variables = len(integrality)
+    row_indices = []
+    column_indices = []
+    coefficients = []
+    lower_bounds = []
+    upper_bounds = []
+
+    for row_index, (row, lower, upper) in enumerate(rows):
+        for column_index, coefficient in row.items():
+            row_indices.append(row_index)
+            column_indices.append(column_index)
+            coefficients.append(coefficient)
+        lower_bounds.append(lower)
+        upper_bounds.append(upper)
+
+    constraint_matrix = coo_matrix(
+        (coefficients, (row_indices, column_indices)),
+        shape=(len(rows), number_of_variables),
+    ).tocsr()
+
+    result = milp(
+        np.zeros(number_of_variables),
+        constraints=LinearConstraint(constraint_matrix, lower_bounds, upper_bounds),
+        integrality=integrality,
+        bounds=Bounds(0, 1),
+        options={"time_limit": time_limit},
+    )
+
+    if result.status == 2:
+        return None
+
+    if result.status == 1 and result.x is None:
+        return False
+
+    if result.x is None:
+        raise RuntimeError("MILP solver failed: " + result.message)
+
+    return result.x
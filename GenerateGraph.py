@@ -21,50 +21,51 @@ def match_e23_e25plus_and_e35plus_edges(
     v3,
     start_index_v5plus,
     v5plus,
-    max_attempts=5000,
 ):
     not_allowed_edges = nx.Graph()
-    allowed_attempts = max_attempts
+
+    def has_remaining_degree(index):
+        return G.degree(index) < expected_vertex_degree[index]
+
+    pairs = get_pair_pool(
+        G, expected_vertex_degree, start_index_v3, v3, start_index_v5plus, v5plus
+    )
 
     # Number of e23 edges <= number of v2
+    # The same v3 and v5plus vertices may be matched to more than one v2 vertex
     for v in range(e23):
-        index_i = start_index_v3 + random.randint(0, v3 - 1)
-        index_j = start_index_v5plus + random.randint(0, v5plus - 1)
-
-        while (
-            G.degree(index_i) >=  expected_vertex_degree[index_i]
-            or G.degree(index_j) >= expected_vertex_degree[index_j]
-        ):
-            if allowed_attempts < 0:
-                return False
-            index_i = start_index_v3 + random.randint(0, v3 - 1)
-            index_j = start_index_v5plus + random.randint(0, v5plus - 1)
-            allowed_attempts -= 1
+        pair = draw_pair(
+            pairs,
+            lambda index_i, index_j: has_remaining_degree(index_i)
+            and has_remaining_degree(index_j),
+        )
+        if pair is None:
+            return False
 
+        index_i, index_j = pair
         G.add_edge(v, index_i)
         G.add_edge(v, index_j)
         not_allowed_edges.add_edge(index_i,index_j)
         e25plus -= 1
 
-    allowed_attempts = max_attempts
+    pairs = get_pair_pool(
+        G, expected_vertex_degree, start_index_v3, v3, start_index_v5plus, v5plus
+    )
 
     # adds e35plus edges as to not make a triangle between a v2, v3 and v5plus vertex
     while e35plus > 0:
-        if allowed_attempts < 0:
+        pair = draw_pair(
+            pairs,
+            lambda index_i, index_j: G.degree(index_i) < 3
+            and has_remaining_degree(index_j)
+            and not G.has_edge(index_i, index_j)
+            and not not_allowed_edges.has_edge(index_i, index_j),
+        )
+        if pair is None:
             return False
 
-        allowed_attempts -= 1
-        index_i = start_index_v3 + random.randint(0, v3 - 1)
-        index_j = start_index_v5plus + random.randint(0, v5plus - 1)
-
-        if (
-            G.degree(index_i) < 3
-            and G.degree(index_j) < expected_vertex_degree[index_j]
-            and not G.has_edge(index_i, index_j)
-            and not not_allowed_edges.has_edge(index_i,index_j)
-        ):
-            G.add_edge(index_i, index_j)
-            e35plus -= 1
+        G.add_edge(*pair)
+        e35plus -= 1
     
 
     # adds remaining e25plus edges
@@ -73,27 +74,21 @@ def match_e23_e25plus_and_e35plus_edges(
     )
 
 
-def add_eii_edges(
-    G, expected_vertex_degree, eii, start_index_vi, vi, max_attempts=3000
-):
-    allowed_attempts = max_attempts
+def add_eii_edges(G, expected_vertex_degree, eii, start_index_vi, vi):
+    pairs = get_pair_pool(G, expected_vertex_degree, start_index_vi, vi)
 
     while eii > 0:
-        if allowed_attempts < 0:
+        pair = draw_pair(
+            pairs,
+            lambda index_i, index_j: G.degree(index_i) < expected_vertex_degree[index_i]
+            and G.degree(index_j) < expected_vertex_degree[index_j]
+            and not G.has_edge(index_i, index_j),
+        )
+        if pair is None:
             return False
 
-        allowed_attempts -= 1
-        index_i = start_index_vi + random.randint(0, vi - 1)
-        index_j = start_index_vi + random.randint(0, vi - 1)
-
-        if (
-            index_i != index_j
-            and G.degree(index_i) < expected_vertex_degree[index_i]
-            and G.degree(index_j) < expected_vertex_degree[index_j]
-            and not G.has_edge(index_i, index_j)
-        ):
-            G.add_edge(index_i, index_j)
-            eii -= 1
+        G.add_edge(*pair)
+        eii -= 1
 
     return True
 
@@ -106,30 +101,271 @@ def add_eij_edges(
     vi,
     start_index_vj,
     vj,
-    max_attempts=3000,
 ):
-    allowed_attempts = max_attempts
+    pairs = get_pair_pool(
+        G, expected_vertex_degree, start_index_vi, vi, start_index_vj, vj
+    )
 
     while eij > 0:
-        if allowed_attempts < 0:
+        pair = draw_pair(
+            pairs,
+            lambda index_i, index_j: G.degree(index_i) < expected_vertex_degree[index_i]
+            and G.degree(index_j) < expected_vertex_degree[index_j]
+            and not G.has_edge(index_i, index_j),
+        )
+        if pair is None:
             return False
 
-        allowed_attempts -= 1
-        index_i = start_index_vi + random.randint(0, vi - 1)
-        index_j = start_index_vj + random.randint(0, vj - 1)
+        G.add_edge(*pair)
+        eij -= 1
 
-        if (
-            G.degree(index_i) < expected_vertex_degree[index_i]
-            and G.degree(index_j) < expected_vertex_degree[index_j]
-            and not G.has_edge(index_i, index_j)
+    return True
+
+
+# Returns every pair of vertices that still have degree left, one from the vi vertices
+# and one from the vj vertices, or every pair of distinct vi vertices if vj is not given
+def get_pair_pool(
+    G, expected_vertex_degree, start_index_vi, vi, start_index_vj=None, vj=None
+):
+    def has_remaining_degree(index):
+        return G.degree(index) < expected_vertex_degree[index]
+
+    vi_pool = [
+        index
+        for index in range(start_index_vi, start_index_vi + vi)
+        if has_remaining_degree(index)
+    ]
+
+    if start_index_vj is None:
+        return [
+            (index_i, index_j)
+            for position, index_i in enumerate(vi_pool)
+            for index_j in vi_pool[position + 1 :]
+        ]
+
+    vj_pool = [
+        index
+        for index in range(start_index_vj, start_index_vj + vj)
+        if has_remaining_degree(index)
+    ]
+    return [(index_i, index_j) for index_i in vi_pool for index_j in vj_pool]
+
+
+# Returns a random pair of the pool that is_valid accepts, or None if there is none left
+# Degrees and edges only grow while a pool is used, so a pair that is not valid never
+# will be again and is removed from the pool for good. This gives every valid pair the
+# same chance, like drawing random pairs until a valid one comes up, but every draw
+# is used and a dead end is found as soon as the pool is empty
+def draw_pair(pairs, is_valid):
+    while pairs:
+        index = random.randrange(len(pairs))
+        if is_valid(*pairs[index]):
+            return pairs[index]
+
+        pairs[index] = pairs[-1]
+        pairs.pop()
+
+    return None
+
+
+# Raised by IncrementalGraph once the graph being built can no longer turn out valid
+class ConstructionDeadEnd(Exception):
+    pass
+
+
+# Edge classes of a row from index 6 on, as the pair of vertex classes they join, like
+# in ExactRealization.py
+edge_classes = [
+    ("2", "3"),
+    ("2", "4"),
+    ("2", "5plus"),
+    ("3", "3"),
+    ("3", "4"),
+    ("3", "5plus"),
+    ("4", "4"),
+    ("4", "5plus"),
+    ("5plus", "5plus"),
+]
+
+
+# Graph that checks every edge added for create_random_graph(), keeping union-find
+# components with the degree each component still has left
+# A component with no degree left can never be joined to the rest, and c components
+# need at least c - 1 more edges, so either one is a dead end
+# Given the row as values, it also counts the edges of every edge class still to add.
+# The ends of those edges must fill the degree every vertex class has left, exactly
+# for the v2, v3 and v4 vertices and as in check_degree_sums() for the v5plus vertices,
+# and an edge class can only go between vertices that still have degree left
+class IncrementalGraph(nx.Graph):
+    def __init__(self, expected_vertex_degree=(), edges=0, values=None):
+        super().__init__()
+        self.add_nodes_from(range(len(expected_vertex_degree)))
+
+        self.parent = list(range(len(expected_vertex_degree)))
+        self.remaining_degree = list(expected_vertex_degree)
+        self.components = len(expected_vertex_degree)
+        self.remaining_edges = edges
+
+        self.values = values
+        if values is not None:
+            v2, v3, v4, v5, v6plus = values[:5]
+            self.v5plus_start = v2 + v3 + v4
+            self.v6plus_start = v2 + v3 + v4 + v5
+
+            self.vertex_class = (
+                ["2"] * v2 + ["3"] * v3 + ["4"] * v4 + ["5plus"] * (v5 + v6plus)
+            )
+            self.remaining_class_edges = dict(zip(edge_classes, values[6:]))
+
+            # Ends of the edges still to add, degree left and vertices with degree
+            # left of every vertex class
+            self.class_edge_ends = dict.fromkeys(["2", "3", "4", "5plus"], 0)
+            for (class_i, class_j), count in self.remaining_class_edges.items():
+                self.class_edge_ends[class_i] += count
+                self.class_edge_ends[class_j] += count
+
+            self.class_degree_left = dict.fromkeys(["2", "3", "4", "5plus"], 0)
+            self.open_vertices = dict.fromkeys(["2", "3", "4", "5plus"], 0)
+            for node, vertex_class in enumerate(self.vertex_class):
+                self.class_degree_left[vertex_class] += expected_vertex_degree[node]
+                if expected_vertex_degree[node] > 0:
+                    self.open_vertices[vertex_class] += 1
+
+            self.degree_left = list(expected_vertex_degree)
+            self.max_degree = values[5]
+
+            # Degree the v5plus vertices need at least, v5 vertices need all their
+            # degree and v6plus vertices degree 6, see check_degree_sums()
+            self.v5plus_lowest_degree_left = 5 * v5 + 6 * v6plus
+
+    def find(self, node):
+        while self.parent[node] != node:
+            self.parent[node] = self.parent[self.parent[node]]
+            node = self.parent[node]
+        return node
+
+    def add_edge(self, u_of_edge, v_of_edge, **attr):
+        super().add_edge(u_of_edge, v_of_edge, **attr)
+
+        root_u = self.find(u_of_edge)
+        root_v = self.find(v_of_edge)
+        if root_u != root_v:
+            self.parent[root_u] = root_v
+            self.remaining_degree[root_v] += self.remaining_degree[root_u]
+            self.components -= 1
+
+        self.remaining_degree[root_v] -= 2
+        self.remaining_edges -= 1
+
+        if self.components > 1 and self.remaining_degree[root_v] <= 0:
+            raise ConstructionDeadEnd("Graph is not connected")
+
+        if self.remaining_edges < self.components - 1:
+            raise ConstructionDeadEnd("Graph is not connected")
+
+        if self.values is not None:
+            edge_class = []
+            for node in [u_of_edge, v_of_edge]:
+                vertex_class = self.vertex_class[node]
+                edge_class.append(vertex_class)
+
+                self.degree_left[node] -= 1
+                self.class_degree_left[vertex_class] -= 1
+                if self.degree_left[node] == 0:
+                    self.open_vertices[vertex_class] -= 1
+
+                if self.v5plus_start <= node and (
+                    node < self.v6plus_start
+                    or self.degree_left[node] >= self.max_degree - 6
+                ):
+                    self.v5plus_lowest_degree_left -= 1
+
+            # Vertex class names sort in the order of edge_classes
+            if edge_class[0] > edge_class[1]:
+                edge_class.reverse()
+            self.remaining_class_edges[tuple(edge_class)] -= 1
+            self.class_edge_ends[edge_class[0]] -= 1
+            self.class_edge_ends[edge_class[1]] -= 1
+
+            if not self.can_fill_classes():
+                raise ConstructionDeadEnd(
+                    "Degree classes can no longer take the edges left"
+                )
+
+    # Checks the edges of every class still to add against the degree left of the
+    # vertex classes they join
+    def can_fill_classes(self):
+        for vertex_class in ["2", "3", "4"]:
+            if (
+                self.class_edge_ends[vertex_class]
+                != self.class_degree_left[vertex_class]
+            ):
+                return False
+
+        # One v6plus vertex also needs the max degree
+        v5plus_lowest_degree_left = self.v5plus_lowest_degree_left
+        if self.v6plus_start < len(self.vertex_class):
+            v5plus_lowest_degree_left += min(
+                min(degree_left, self.max_degree - 6)
+                for degree_left in self.degree_left[self.v6plus_start :]
+            )
+
+        if not (
+            v5plus_lowest_degree_left
+            <= self.class_edge_ends["5plus"]
+            <= self.class_degree_left["5plus"]
         ):
-            G.add_edge(index_i, index_j)
-            eij -= 1
+            return False
+
+        for (class_i, class_j), count in self.remaining_class_edges.items():
+            open_i = self.open_vertices[class_i]
+            if count < 0:
+                return False
+            if class_i == class_j:
+                if count > open_i * (open_i - 1) // 2:
+                    return False
+            elif count > open_i * self.open_vertices[class_j]:
+                return False
+
+        return True
 
-    return True
 
+# Checks that the edge counts of a row can fill the expected degree of every class
+# Every v2, v3 and v4 vertex must reach its degree exactly, v5plus vertices may end
+# below the max degree as long as v5 vertices reach 5, v6plus vertices reach 6 and one
+# vertex reaches the max degree
+def check_degree_sums(values, expected_vertex_degree):
+    v2, v3, v4, v5, v6plus, max_degree = values[:6]
+    e23, e24, e25plus, e33, e34, e35plus, e44, e45plus, e55plus = values[6:]
 
-def create_random_graph(values):
+    class_degrees = [
+        (2 * v2, e23 + e24 + e25plus),
+        (3 * v3, e23 + 2 * e33 + e34 + e35plus),
+        (4 * v4, e24 + e34 + 2 * e44 + e45plus),
+    ]
+    for expected_degree, edge_ends in class_degrees:
+        if expected_degree != edge_ends:
+            return "Vertex degree counts don't match constraints"
+
+    v5plus_edge_ends = e25plus + e35plus + e45plus + 2 * e55plus
+    v5plus_lowest_degree = 5 * v5 + 6 * v6plus
+    if v6plus > 0:
+        v5plus_lowest_degree += max_degree - 6
+
+    if not (
+        v5plus_lowest_degree
+        <= v5plus_edge_ends
+        <= sum(expected_vertex_degree[v2 + v3 + v4 :])
+    ):
+        return "Vertex degree counts don't match constraints"
+
+    return None
+
+
+# Builds a random graph for a row of the integer solutions, or returns why it failed
+# With incremental, the construction stops as soon as it can no longer reach a
+# connected graph with the expected degrees
+def create_random_graph(values, incremental=False):
     # expected array format and index:
     #  0 |  1 |  2 |  3 |    4   |   5   |  6  |  7  |    8    |  9  |  10 |    11   |  12 |    13   |   14
     # v2 | v3 | v4 | v5 | v6plus | delta | e23 | e24 | e25plus | e33 | e34 | e35plus | e44 | e45plus | e55plus
@@ -153,9 +389,16 @@ def create_random_graph(values):
         expected_vertex_degree[expected_degree_index] = values[5]
         expected_degree_index += 1
 
-    G = nx.Graph()
+    if incremental:
+        error = check_degree_sums(values, expected_vertex_degree)
+        if error is not None:
+            return error
+
+        G = IncrementalGraph(expected_vertex_degree, sum(values[6:]), values)
+    else:
+        G = nx.Graph()
 
-    G.add_nodes_from(range(24))
+        G.add_nodes_from(range(24))
 
     v2 = values[0]
     v3 = values[1]
@@ -181,39 +424,45 @@ def create_random_graph(values):
     e45plus = values[13]
     e55plus = values[14]
 
-    if not match_e23_e25plus_and_e35plus_edges(
-        G,
-        expected_vertex_degree,
-        e23,
-        e25plus,
-        e35plus,
-        v2,
-        start_index_v3,
-        v3,
-        start_index_v5plus,
-        v5plus,
-    ):
-        return "Error adding e23, e25plus and e35plus edges"
+    try:
+        if not match_e23_e25plus_and_e35plus_edges(
+            G,
+            expected_vertex_degree,
+            e23,
+            e25plus,
+            e35plus,
+            v2,
+            start_index_v3,
+            v3,
+            start_index_v5plus,
+            v5plus,
+        ):
+            return "Error adding e23, e25plus and e35plus edges"
 
-    eii_parameters = [
-        [e33, start_index_v3, v3],
-        [e44, start_index_v4, v4],
-        [e55plus, start_index_v5plus, v5plus],
-    ]
+        eii_parameters = [
+            [e33, start_index_v3, v3],
+            [e44, start_index_v4, v4],
+            [e55plus, start_index_v5plus, v5plus],
+        ]
 
-    for eii_parameter_set in eii_parameters:
-        if not add_eii_edges(G, expected_vertex_degree, *eii_parameter_set):
-            return "eii edge could not be added"
+        for eii_parameter_set in eii_parameters:
+            if not add_eii_edges(G, expected_vertex_degree, *eii_parameter_set):
+                return "eii edge could not be added"
 
-    eij_parameters = [
-        [e24, start_index_v2, v2, start_index_v4, v4],
-        [e34, start_index_v3, v3, start_index_v4, v4],
-        [e45plus, start_index_v4, v4, start_index_v5plus, v5plus],
-    ]
+        eij_parameters = [
+            [e24, start_index_v2, v2, start_index_v4, v4],
+            [e34, start_index_v3, v3, start_index_v4, v4],
+            [e45plus, start_index_v4, v4, start_index_v5plus, v5plus],
+        ]
+
+        for eij_parameter_set in eij_parameters:
+            if not add_eij_edges(G, expected_vertex_degree, *eij_parameter_set):
+                return "eij edge could not be added"
+    except ConstructionDeadEnd as dead_end:
+        return str(dead_end)
 
-    for eij_parameter_set in eij_parameters:
-        if not add_eij_edges(G, expected_vertex_degree, *eij_parameter_set):
-            return "eij edge could not be added"
+    if incremental:
+        G = nx.Graph(G)
 
     if G.number_of_edges() != 35:
         return "Edges does not equal 35", G.number_of_edges()
@@ -221,7 +470,11 @@ def create_random_graph(values):
     if not nx.is_connected(G):
         return "Graph is not connected"
 
-    if nx.diameter(G) > 5:
+    # Stops at the first vertex with a vertex further than 5 away
+    if any(
+        len(nx.single_source_shortest_path_length(G, node, cutoff=5)) < 24
+        for node in G.nodes
+    ):
         return "Not a broadcast graph, diameter > 5"
 
     degrees = dict(G.degree())
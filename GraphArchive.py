@@ -0,0 +1,181 @@
+import networkx as nx
+import numpy as np
+import os
+import GraphSymmetry
+
+
+"""
+Keeps every graph found in an append-only graph6 file, with an index of where each graph
+came from, so graphs can be read back quickly and are never overwritten
+"""
+
+
+index_magic = b"B24GIDX1"
+
+# One index record per graph, where the graph6 line of the graph starts in the graph6
+# file and its length, followed by what is known about the graph. row is -1 and verdict
+# is -1 when they are not known, verdict is 1 for a broadcast graph and 0 otherwise.
+# broadcast_time is the broadcast time the graph was verified for
+index_dtype = np.dtype(
+    [
+        ("offset", "<u8"),
+        ("length", "<u4"),
+        ("number_of_nodes", "<u4"),
+        ("row", "<i8"),
+        ("seed", "<u8"),
+        ("verdict", "i1"),
+        ("broadcast_time", "<i2"),
+        ("hash", "S32"),
+    ]
+)
+
+
+# The graph6 file is a valid graph6 file on its own, one graph per line, so other tools
+# can read it. The index is stored next to it in file_path + ".idx"
+# A graph is written to the graph6 file before its index record, so a run stopped in
+# between only leaves an unindexed line, and a record cut short is dropped on opening
+# With read_only, the archive must exist and its files are never changed, a record cut
+# short is only left out
+class GraphArchive:
+    def __init__(self, file_path, read_only=False):
+        self.file_path = file_path
+        self.index_path = file_path + ".idx"
+        self.read_only = read_only
+
+        if not read_only and not os.path.exists(self.index_path):
+            with open(self.index_path, "wb") as file:
+                file.write(index_magic)
+            open(file_path, "ab").close()
+
+        with open(self.index_path, "rb") as file:
+            if file.read(len(index_magic)) != index_magic:
+                raise ValueError(self.index_path + " is not a graph archive index")
+
+        records_size = os.path.getsize(self.index_path) - len(index_magic)
+        if not read_only and records_size % index_dtype.itemsize != 0:
+            with open(self.index_path, "r+b") as file:
+                file.truncate(
+                    len(index_magic)
+                    + records_size // index_dtype.itemsize * index_dtype.itemsize
+                )
+
+    def __len__(self):
+        return (
+            os.path.getsize(self.index_path) - len(index_magic)
+        ) // index_dtype.itemsize
+
+    # Returns the index as a read only memory map, one record per graph
+    def get_index(self):
+        if len(self) == 0:
+            return np.zeros(0, dtype=index_dtype)
+
+        return np.memmap(
+            self.index_path,
+            dtype=index_dtype,
+            mode="r",
+            offset=len(index_magic),
+            shape=(len(self),),
+        )
+
+    # Returns the (row, seed) pairs of the graphs archived from a row
+    def get_archived_rows(self):
+        index = self.get_index()
+        known = index["row"] >= 0
+        return set(zip(index["row"][known].tolist(), index["seed"][known].tolist()))
+
+    # Adds G to the archive and returns its record number
+    def append(self, G, row=-1, seed=0, verdict=-1, broadcast_time=-1):
+        if self.read_only:
+            raise ValueError(self.file_path + " was opened read only")
+
+        line = nx.to_graph6_bytes(G, nodes=sorted(G.nodes), header=False)
+
+        with open(self.file_path, "ab") as file:
+            offset = file.tell()
+            file.write(line)
+
+        record = np.zeros(1, dtype=index_dtype)
+        record["offset"] = offset
+        record["length"] = len(line)
+        record["number_of_nodes"] = G.number_of_nodes()
+        record["row"] = row
+        record["seed"] = seed
+        record["verdict"] = -1 if verdict is None else int(verdict)
+        record["broadcast_time"] = broadcast_time
+        record["hash"] = GraphSymmetry.get_invariant_hash(G).encode()
+
+        with open(self.index_path, "ab") as file:
+            file.write(record.tobytes())
+
+        return len(self) - 1
+
+    # Returns the edges of every record as arrays of shape (edges, 2), in the order of
+    # records (every record if None). Graphs with the same number of vertices are
+    # decoded together from a memory map of the graph6 file
+    def read_edges(self, records=None):
+        index = self.get_index()
+        if records is None:
+            records = np.arange(len(index))
+        records = np.asarray(records, dtype=np.int64)
+
+        edges = [None] * len(records)
+        if len(records) == 0:
+            return edges
+
+        data = np.memmap(self.file_path, dtype=np.uint8, mode="r")
+        selected = index[records]
+
+        for n in np.unique(selected["number_of_nodes"]):
+            positions = np.flatnonzero(selected["number_of_nodes"] == n)
+            pairs = _get_vertex_pairs(int(n))
+            header_length = _get_header_length(int(n))
+            data_length = -(-len(pairs) // 6)
+
+            starts = selected["offset"][positions].astype(np.int64) + header_length
+            rows = data[starts[:, None] + np.arange(data_length)] - 63
+
+            # Every byte holds 6 bits of the upper triangle, most significant bit first
+            bits = np.unpackbits(rows.astype(np.uint8)[:, :, None], axis=2)[:, :, 2:]
+            bits = bits.reshape(len(positions), -1)[:, : len(pairs)].astype(bool)
+
+            for position, graph_bits in zip(positions, bits):
+                edges[position] = pairs[graph_bits]
+
+        return edges
+
+    # Returns the graph of a record, with vertices 0 to n - 1
+    def get_graph(self, record):
+        G = nx.Graph()
+        G.add_nodes_from(range(int(self.get_index()[record]["number_of_nodes"])))
+        G.add_edges_from(self.read_edges([record])[0].tolist())
+        return G
+
+    # Returns the records of the graphs isomorphic to G
+    def find(self, G):
+        index = self.get_index()
+        records = np.flatnonzero(
+            index["hash"] == GraphSymmetry.get_invariant_hash(G).encode()
+        )
+        return [
+            int(record)
+            for record in records
+            if GraphSymmetry.find_isomorphism(self.get_graph(record), G) is not None
+        ]
+
+
+# graph6 lists the upper triangle column by column: (0, 1), (0, 2), (1, 2), (0, 3), ...
+def _get_vertex_pairs(n):
+    columns, rows = np.triu_indices(n, 1)[::-1]
+    order = np.lexsort((rows, columns))
+    return np.stack([rows[order], columns[order]], axis=1)
+
+
+# Bytes taken by the number of vertices at the start of a graph6 line
+def _get_header_length(n):
+    if n <= 62:
+        return 1
+
+    if n <= 258047:
+        return 4
+
+    return 8
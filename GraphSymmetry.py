@@ -0,0 +1,283 @@
+import networkx as nx
+import hashlib
+from PreparedGraph import prepare_graph
+
+
+"""
+Finds the vertex orbits of a graph's automorphism group, so vertices that look the same
+from inside the graph only have to be checked once, and compares graphs up to isomorphism
+"""
+
+
+# Returns the orbits of the automorphism group of G as sorted lists of vertices,
+# ordered by their smallest vertex
+def get_vertex_orbits(G):
+    G = prepare_graph(G)
+
+    if "vertex_orbits" in G.cache:
+        return G.cache["vertex_orbits"]
+
+    parent = list(G.nodes())
+
+    def find(vertex):
+        while parent[vertex] != vertex:
+            parent[vertex] = parent[parent[vertex]]
+            vertex = parent[vertex]
+        return vertex
+
+    # Vertices in the same orbit end up with the same refined colour, so only those
+    # are compared
+    colors = _get_refined_colors(G, [_get_invariant(G, vertex) for vertex in G.nodes()])
+    invariant_classes = {}
+    for vertex in G.nodes():
+        invariant_classes.setdefault(colors[vertex], []).append(vertex)
+
+    for invariant_class in invariant_classes.values():
+        for vertex in invariant_class:
+            # Vertices found to not be in the orbit of vertex, so neither is their orbit
+            refuted_vertices = []
+
+            for other in invariant_class:
+                if find(other) == find(vertex):
+                    continue
+
+                if any(find(other) == find(refuted) for refuted in refuted_vertices):
+                    continue
+
+                automorphism = find_automorphism(G, vertex, other, colors)
+                if automorphism is None:
+                    refuted_vertices.append(other)
+                    continue
+
+                # Every vertex is in the same orbit as its image
+                for image_source, image in automorphism.items():
+                    parent[find(image_source)] = find(image)
+
+    orbits = {}
+    for vertex in G.nodes():
+        orbits.setdefault(find(vertex), []).append(vertex)
+
+    G.cache["vertex_orbits"] = sorted(orbits.values())
+    return G.cache["vertex_orbits"]
+
+
+# Returns the orbit representative (its smallest vertex) of every vertex
+def get_orbit_representatives(G):
+    representatives = {}
+    for orbit in get_vertex_orbits(G):
+        for vertex in orbit:
+            representatives[vertex] = orbit[0]
+
+    return representatives
+
+
+# Hash of G that is equal for isomorphic graphs, graphs with the same hash still need
+# find_isomorphism() to tell if they are isomorphic
+def get_invariant_hash(G):
+    G = prepare_graph(G)
+
+    if "invariant_hash" not in G.cache:
+        digest = hashlib.sha256(str(G.number_of_nodes).encode())
+        _get_refined_colors(
+            G, [_get_invariant(G, vertex) for vertex in G.nodes()], digest
+        )
+        G.cache["invariant_hash"] = digest.hexdigest()[:32]
+
+    return G.cache["invariant_hash"]
+
+
+# Returns the edges of G relabelled in an order that only depends on the structure of G,
+# so two graphs are isomorphic exactly when their canonical forms are equal
+# Vertices are ordered by their refined colour. While a colour is shared, every vertex
+# of the first shared colour in turn gets a colour of its own and the colours are
+# refined again, and the smallest edge list of all the orders reached is kept. Two
+# orders giving the same edge list give an automorphism, and vertices an automorphism
+# found so far maps onto each other give the same edge lists, so only one is tried
+def get_canonical_form(G):
+    G = prepare_graph(G)
+
+    if "canonical_form" in G.cache:
+        return G.cache["canonical_form"]
+
+    edges = G.graph.edges()
+    best = {"form": None, "labels": None}
+    automorphisms = []
+
+    def search(colors, fixed):
+        counts = {}
+        for color in colors:
+            counts[color] = counts.get(color, 0) + 1
+        shared = [color for color, count in counts.items() if count > 1]
+
+        if not shared:
+            form = tuple(
+                sorted(tuple(sorted((colors[u], colors[v]))) for u, v in edges)
+            )
+            if best["form"] is None or form < best["form"]:
+                best["form"] = form
+                best["labels"] = colors
+            elif form == best["form"]:
+                vertex_of_label = {
+                    label: vertex for vertex, label in enumerate(best["labels"])
+                }
+                automorphisms.append(
+                    [vertex_of_label[colors[vertex]] for vertex in G.nodes()]
+                )
+            return
+
+        cell_color = min(shared)
+        tried = []
+        for vertex in G.nodes():
+            if colors[vertex] != cell_color:
+                continue
+
+            # Automorphisms fixing every vertex given a colour of its own so far map
+            # the branches of vertices in the same orbit onto each other
+            if any(
+                _same_orbit(automorphisms, fixed, vertex, other) for other in tried
+            ):
+                continue
+            tried.append(vertex)
+
+            search(
+                _get_refined_colors(
+                    G, [(color, node == vertex) for node, color in enumerate(colors)]
+                ),
+                fixed + [vertex],
+            )
+
+    search(
+        _get_refined_colors(G, [_get_invariant(G, vertex) for vertex in G.nodes()]),
+        [],
+    )
+
+    G.cache["canonical_form"] = (G.number_of_nodes, best["form"])
+    return G.cache["canonical_form"]
+
+
+# Hash of the canonical form of G, equal exactly for isomorphic graphs (up to the
+# chance of a collision of the hash)
+def get_canonical_hash(G):
+    G = prepare_graph(G)
+
+    if "canonical_hash" not in G.cache:
+        G.cache["canonical_hash"] = hashlib.sha256(
+            repr(get_canonical_form(G)).encode()
+        ).hexdigest()[:32]
+
+    return G.cache["canonical_hash"]
+
+
+# Checks if the automorphisms that fix every vertex of fixed map u to v
+def _same_orbit(automorphisms, fixed, u, v):
+    parent = {}
+
+    def find(vertex):
+        while parent.get(vertex, vertex) != vertex:
+            vertex = parent[vertex]
+        return vertex
+
+    for automorphism in automorphisms:
+        if any(automorphism[vertex] != vertex for vertex in fixed):
+            continue
+
+        for vertex, image in enumerate(automorphism):
+            root, image_root = find(vertex), find(image)
+            if root != image_root:
+                parent[root] = image_root
+
+    return find(u) == find(v)
+
+
+# Returns an isomorphism from G1 to G2 as a dictionary, or None if there is none
+def find_isomorphism(G1, G2):
+    G1 = prepare_graph(G1)
+    G2 = prepare_graph(G2)
+
+    if G1.number_of_nodes != G2.number_of_nodes or sorted(G1.degree) != sorted(
+        G2.degree
+    ):
+        return None
+
+    return nx.vf2pp_isomorphism(G1.graph, G2.graph)
+
+
+# Returns an automorphism of G mapping u to v as a dictionary, or None if there is none
+# colors can be a refined colouring of G to reuse, see _get_refined_colors()
+def find_automorphism(G, u, v, colors=None):
+    G = prepare_graph(G)
+
+    if u == v:
+        return {vertex: vertex for vertex in G.nodes()}
+
+    if colors is None:
+        colors = _get_refined_colors(
+            G, [_get_invariant(G, vertex) for vertex in G.nodes()]
+        )
+
+    # Gives u and v a colour of their own and refines again, an automorphism mapping
+    # u to v has to map every vertex to a vertex of the same colour
+    u_colors = _get_refined_colors(
+        G, [(color, node == u) for node, color in enumerate(colors)]
+    )
+    v_colors = _get_refined_colors(
+        G, [(color, node == v) for node, color in enumerate(colors)]
+    )
+    if sorted(u_colors) != sorted(v_colors):
+        return None
+
+    G1 = nx.Graph(G.graph)
+    G2 = nx.Graph(G.graph)
+    nx.set_node_attributes(G1, dict(enumerate(u_colors)), "color")
+    nx.set_node_attributes(G2, dict(enumerate(v_colors)), "color")
+
+    matcher = nx.algorithms.isomorphism.GraphMatcher(
+        G1,
+        G2,
+        node_match=lambda first, second: first["color"] == second["color"],
+    )
+
+    for automorphism in matcher.isomorphisms_iter():
+        return automorphism
+
+    return None
+
+
+# Colour refinement: vertices start with the given colours, then are split by the
+# colours of their neighbours until no colour class splits anymore
+# Returns colours as integers that only depend on the structure, not on vertex labels
+# If a hashlib digest is given, the colour classes of every round are added to it
+def _get_refined_colors(G, initial_colors, digest=None):
+    colors = _relabel_colors(initial_colors)
+
+    if digest is not None:
+        digest.update(repr(sorted(initial_colors)).encode())
+
+    while True:
+        signatures = [
+            (
+                colors[vertex],
+                tuple(sorted(colors[neighbor] for neighbor in G.neighbors[vertex])),
+            )
+            for vertex in G.nodes()
+        ]
+        refined_colors = _relabel_colors(signatures)
+
+        if digest is not None:
+            digest.update(repr(sorted(signatures)).encode())
+
+        if len(set(refined_colors)) == len(set(colors)):
+            return refined_colors
+
+        colors = refined_colors
+
+
+# Replaces colours by their rank among the distinct colours
+def _relabel_colors(colors):
+    ranks = {color: rank for rank, color in enumerate(sorted(set(colors)))}
+    return [ranks[color] for color in colors]
+
+
+# Degree and number of vertices at each distance, equal for vertices in the same orbit
+def _get_invariant(G, vertex):
+    return G.degree[vertex], tuple(G.get_layer_counts(vertex))
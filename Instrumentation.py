@@ -0,0 +1,231 @@
+import atexit
+import contextlib
+import cProfile
+import csv
+import io
+import json
+import os
+import time
+from multiprocessing import util
+
+
+"""
+Counts and times what happens in the hot paths of a run, and writes it to a JSON lines or
+CSV file, turned on from the environment so no code has to change to measure a run
+"""
+
+
+# Set B24_METRICS to a file name to record metrics, a name ending in .csv writes CSV
+# rows, any other name JSON lines. Every process appends what it recorded since its last
+# flush(), when it calls flush() and when it exits, so the file can be summed up with
+# read_metrics() while the run goes on
+# Set B24_PROFILE to a file name prefix to profile every process with cProfile, each
+# process writes its profile to prefix + "." + pid + ".prof" when it exits
+metrics_path = os.environ.get("B24_METRICS")
+profile_prefix = os.environ.get("B24_PROFILE")
+
+# Checked by the hot paths before recording anything, so metrics cost nothing when off
+enabled = bool(metrics_path)
+
+# Recorded since the last flush() of this process
+counters = {}
+timers = {}
+histograms = {}
+
+_last_flush_time = time.monotonic()
+_profiler = None
+_profiled_pid = None
+
+
+def count(name, amount=1):
+    counters[name] = counters.get(name, 0) + amount
+
+
+# Adds amount to the count of value in the histogram called name
+def observe(name, value, amount=1):
+    histogram = histograms.setdefault(name, {})
+    histogram[value] = histogram.get(value, 0) + amount
+
+
+def add_time(name, seconds):
+    timer = timers.setdefault(name, {"count": 0, "seconds": 0.0, "max_seconds": 0.0})
+    timer["count"] += 1
+    timer["seconds"] += seconds
+    timer["max_seconds"] = max(timer["max_seconds"], seconds)
+
+
+# Times the code run inside the with block, when metrics are on
+@contextlib.contextmanager
+def timer(name):
+    if not enabled:
+        yield
+        return
+
+    start_time = time.perf_counter()
+    try:
+        yield
+    finally:
+        add_time(name, time.perf_counter() - start_time)
+
+
+# Flushes when more than interval seconds went by since the last flush, for processes
+# that run a long time
+def flush_every(interval=10):
+    if enabled and time.monotonic() - _last_flush_time > interval:
+        flush()
+
+
+# Appends what this process recorded since its last flush to the metrics file
+def flush():
+    global _last_flush_time
+
+    if not enabled or not (counters or timers or histograms):
+        return
+
+    _last_flush_time = time.monotonic()
+
+    record = {
+        "time": time.time(),
+        "pid": os.getpid(),
+        "counters": dict(counters),
+        "timers": {name: dict(timer) for name, timer in timers.items()},
+        "histograms": {
+            name: {str(value): number for value, number in histogram.items()}
+            for name, histogram in histograms.items()
+        },
+    }
+    counters.clear()
+    timers.clear()
+    histograms.clear()
+
+    if metrics_path.endswith(".csv"):
+        text = _to_csv(record)
+    else:
+        text = json.dumps(record) + "\n"
+
+    # One write per flush, so lines of different processes are not mixed
+    with open(metrics_path, "a") as file:
+        file.write(text)
+
+
+# One row per value: time, pid, kind, name, key, value
+def _to_csv(record):
+    rows = []
+    for name, value in record["counters"].items():
+        rows.append(["counter", name, "", value])
+    for name, timer in record["timers"].items():
+        for key, value in timer.items():
+            rows.append(["timer", name, key, value])
+    for name, histogram in record["histograms"].items():
+        for key, value in histogram.items():
+            rows.append(["histogram", name, key, value])
+
+    text = io.StringIO()
+    writer = csv.writer(text, lineterminator="\n")
+    if not os.path.exists(metrics_path) or os.path.getsize(metrics_path) == 0:
+        writer.writerow(["time", "pid", "kind", "name", "key", "value"])
+    for row in rows:
+        writer.writerow([f"{record['time']:.3f}", record["pid"]] + row)
+
+    return text.getvalue()
+
+
+# Adds up every record of a metrics file, in the format of a JSON lines record
+def read_metrics(file_path):
+    total = {"counters": {}, "timers": {}, "histograms": {}}
+
+    def add_timer(name, key, value):
+        timer = total["timers"].setdefault(
+            name, {"count": 0, "seconds": 0.0, "max_seconds": 0.0}
+        )
+        if key == "max_seconds":
+            timer[key] = max(timer[key], value)
+        else:
+            timer[key] += value
+
+    with open(file_path, "r") as file:
+        if file_path.endswith(".csv"):
+            for row in csv.DictReader(file):
+                name, key = row["name"], row["key"]
+                if row["kind"] == "counter":
+                    total["counters"][name] = total["counters"].get(name, 0) + int(
+                        row["value"]
+                    )
+                elif row["kind"] == "timer":
+                    value = row["value"]
+                    add_timer(name, key, int(value) if key == "count" else float(value))
+                else:
+                    histogram = total["histograms"].setdefault(name, {})
+                    histogram[key] = histogram.get(key, 0) + int(row["value"])
+        else:
+            for line in file:
+                record = json.loads(line)
+                for name, value in record["counters"].items():
+                    total["counters"][name] = total["counters"].get(name, 0) + value
+                for name, timer in record["timers"].items():
+                    for key, value in timer.items():
+                        add_timer(name, key, value)
+                for name, histogram in record["histograms"].items():
+                    total_histogram = total["histograms"].setdefault(name, {})
+                    for key, value in histogram.items():
+                        total_histogram[key] = total_histogram.get(key, 0) + value
+
+    return total
+
+
+def start_profile():
+    global _profiler
+    global _profiled_pid
+
+    # A forked process stops the profiler it got from its parent first
+    if _profiler is not None:
+        _profiler.disable()
+
+    _profiler = cProfile.Profile()
+    _profiled_pid = os.getpid()
+    _profiler.enable()
+
+
+def stop_profile():
+    global _profiler
+
+    if _profiler is None or _profiled_pid != os.getpid():
+        return
+
+    _profiler.disable()
+    _profiler.dump_stats(profile_prefix + "." + str(os.getpid()) + ".prof")
+    _profiler = None
+
+
+# Worker processes started by multiprocessing leave without running atexit handlers, but
+# run the finalizers of multiprocessing.util, which the main process also runs at exit
+def _at_exit():
+    stop_profile()
+    flush()
+
+
+# A process forked by multiprocessing starts with its own empty records and profiler
+def _start_process(_):
+    counters.clear()
+    timers.clear()
+    histograms.clear()
+
+    if profile_prefix:
+        start_profile()
+
+    util.Finalize(None, _at_exit, exitpriority=100)
+
+
+class _ForkHook:
+    pass
+
+
+_fork_hook = _ForkHook()
+
+if enabled or profile_prefix:
+    if profile_prefix:
+        start_profile()
+
+    util.Finalize(None, _at_exit, exitpriority=100)
+    atexit.register(_at_exit)
+    util.register_after_fork(_fork_hook, _start_process)
@@ -1,15 +1,25 @@
+import networkx as nx
 import CheckBroadcastTime
+import argparse
+import json
 import pickle
 import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from GraphArchive import GraphArchive
 
 
 """
-Use this code to read a potential broadcast graph found
+Use this code to read a potential broadcast graph found, or to verify many saved graphs
+at once with --batch
 """
 
 
+summary_file_name = "Verification summary.json"
+
+
 def main():
-    file_name = "B24_35 edges.pkl"
+    file_name = "B24_35 edges.g6"
 
     while True:
         file_name = input("Enter the file name: ")
@@ -19,14 +29,172 @@ def main():
         else:
             print("File does not exist. Please enter a valid file name.")
 
-    with open(file_name, "rb") as file:
-        loaded_graph = pickle.load(file)
+    record = None
+    if is_graph_archive(file_name):
+        archive = GraphArchive(file_name, read_only=True)
+        record = input(
+            f"Enter the record number (0 to {len(archive) - 1}, empty for the last one): "
+        )
+        record = int(record) if record.strip() else None
+
+    loaded_graph = load_graph(file_name, record)
 
     if CheckBroadcastTime.is_broadcast_graph(loaded_graph, max_attempts=300):
         print("We found one :)")
     
-    CheckBroadcastTime.show_broadcast_spanning_trees(loaded_graph)
+    CheckBroadcastTime.show_spanning_trees(loaded_graph, max_attempts=300)
+
+
+# Checks if the file is the graph6 file of a GraphArchive, otherwise it is a pickled graph
+def is_graph_archive(file_name):
+    return os.path.exists(file_name + ".idx")
+
+
+# Loads a pickled graph, or a record of a GraphArchive (the last one if record is None)
+def load_graph(file_name, record=None):
+    if is_graph_archive(file_name):
+        archive = GraphArchive(file_name, read_only=True)
+        if record is None:
+            record = len(archive) - 1
+        return archive.get_graph(record)
+
+    with open(file_name, "rb") as file:
+        return pickle.load(file)
+
+
+# Verifies every graph of paths (pickled graphs, graph archives or directories of them)
+# across workers processes, without showing anything. Writes a summary with the verdict,
+# confidence and verification time of every graph to summary_path as JSON
+def batch_main(paths, workers=None, max_attempts=300, summary_path=summary_file_name):
+    start_time = time.time()
+
+    graphs = read_saved_graphs(paths)
+    print("Graphs to verify:", len(graphs))
+
+    if workers is None:
+        workers = os.cpu_count()
+
+    jobs = [graph + (max_attempts,) for graph in graphs]
+    if workers <= 1:
+        results = [verify_saved_graph(*job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(verify_saved_graph, *zip(*jobs)))
+
+    for result in results:
+        name = result["file"]
+        if result["record"] is not None:
+            name += " #" + str(result["record"])
+
+        verdict = "broadcast graph" if result["verdict"] else "not a broadcast graph"
+        print(f"{name}: {verdict} ({result['seconds']:.3f} seconds)")
+
+    runtime = time.time() - start_time
+    summary = {
+        "graphs": results,
+        "broadcast_graphs": sum(result["verdict"] for result in results),
+        "max_attempts": max_attempts,
+        "workers": workers,
+        "seconds": runtime,
+    }
+    with open(summary_path, "w") as file:
+        json.dump(summary, file, indent=2)
+
+    print("Broadcast graphs:", summary["broadcast_graphs"], "of", len(results))
+    print(f"Runtime: {runtime:.3f} seconds, summary written to {summary_path}")
+    return summary
+
+
+# Returns (file name, record) for every saved graph, record is None for pickled graphs
+# Directories are searched for .pkl files and graph archives
+def get_saved_graphs(paths):
+    graphs = []
+
+    for path in paths:
+        if os.path.isdir(path):
+            file_names = [
+                os.path.join(path, file_name)
+                for file_name in sorted(os.listdir(path))
+                if file_name.endswith(".pkl")
+                or is_graph_archive(os.path.join(path, file_name))
+            ]
+        else:
+            file_names = [path]
+
+        for file_name in file_names:
+            if is_graph_archive(file_name):
+                graphs.extend(
+                    (file_name, record)
+                    for record in range(len(GraphArchive(file_name, read_only=True)))
+                )
+            else:
+                graphs.append((file_name, None))
+
+    return graphs
+
+
+# Returns (file name, record, nodes, edges) for every saved graph of get_saved_graphs(),
+# the records of a graph archive are decoded together with GraphArchive.read_edges()
+def read_saved_graphs(paths):
+    graphs = []
+    archive_records = {}
+
+    for file_name, record in get_saved_graphs(paths):
+        if record is None:
+            G = load_graph(file_name)
+            graphs.append((file_name, None, list(G.nodes), list(G.edges)))
+        else:
+            archive_records.setdefault(file_name, []).append(len(graphs))
+            graphs.append((file_name, record, None, None))
+
+    for file_name, positions in archive_records.items():
+        archive = GraphArchive(file_name, read_only=True)
+        records = [graphs[position][1] for position in positions]
+        index = archive.get_index()
+
+        for position, record, edges in zip(
+            positions, records, archive.read_edges(records)
+        ):
+            nodes = range(int(index[record]["number_of_nodes"]))
+            graphs[position] = (file_name, record, nodes, edges)
+
+    return graphs
+
+
+# Builds a graph from the nodes and edges of read_saved_graphs()
+def build_graph(nodes, edges):
+    G = nx.Graph()
+    G.add_nodes_from(nodes)
+    G.add_edges_from(edges.tolist() if hasattr(edges, "tolist") else edges)
+    return G
+
+
+def verify_saved_graph(file_name, record, nodes, edges, max_attempts):
+    G = build_graph(nodes, edges)
+
+    start_time = time.time()
+    verdict, confidence = CheckBroadcastTime.is_broadcast_graph(
+        G, max_attempts=max_attempts, return_confidence=True
+    )
+
+    return {
+        "file": file_name,
+        "record": record,
+        "verdict": bool(verdict),
+        "confidence": confidence,
+        "seconds": time.time() - start_time,
+    }
 
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--batch", nargs="+", default=None)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--max-attempts", type=int, default=300)
+    parser.add_argument("--summary", default=summary_file_name)
+    args = parser.parse_args()
+
+    if args.batch is None:
+        main()
+    else:
+        batch_main(args.batch, args.workers, args.max_attempts, args.summary)
@@ -0,0 +1,288 @@
+import argparse
+import multiprocessing
+import numpy as np
+import os
+import queue
+import random
+import time
+import PrintIntegerSolutions
+import ProcessIntegerSolutions
+import Instrumentation
+from GraphArchive import GraphArchive
+from VerifiedGraphCache import VerifiedGraphCache
+
+
+"""
+Enumerates the integer solutions, generates their graphs and verifies them at the same
+time, instead of one step after the other. Rows and graphs are passed between the stages
+through bounded queues, so a stage that runs ahead waits for the next one and memory
+stays the same however many rows there are
+"""
+
+
+# Put on a queue once per process reading it, when nothing more will be put on it
+_stop = None
+
+# Sent to the results queue by each generator and verifier process when it finishes
+generator_finished = "generator finished"
+verifier_finished = "verifier finished"
+
+
+# Runs the enumeration in one process, with generators processes building the graphs of
+# the rows and verifiers processes verifying them. Each queue holds at most queue_size
+# rows or graphs. The graphs are the same as ProcessIntegerSolutions.main() builds with
+# the same seed, since every row has its own random stream
+# The exhaustive construction is not supported, since it builds and verifies the graphs
+# of a row together. Graphs are archived like ProcessIntegerSolutions.main() does
+def main(
+    n=24,
+    edges=35,
+    new_constraints=PrintIntegerSolutions.check_new_constraints_flag,
+    generators=1,
+    verifiers=None,
+    queue_size=64,
+    seed=None,
+    max_attempts=1000,
+    verify_options=None,
+    cache_path=None,
+    construction="random",
+    archive_path=ProcessIntegerSolutions.saved_graph_file_name,
+    archive_all=False,
+):
+    if construction not in ("random", "incremental", "exact"):
+        raise ValueError(
+            "The pipeline does not support the " + construction + " construction"
+        )
+
+    if verify_options is None:
+        verify_options = {}
+
+    if verifiers is None:
+        verifiers = max(os.cpu_count() - generators - 1, 1)
+
+    cache = None
+    if cache_path is not None:
+        cache = VerifiedGraphCache(cache_path)
+        print("Cached graphs:", len(cache))
+
+    if seed is None:
+        seed = np.random.SeedSequence().entropy
+    print("Seed:", seed)
+
+    archive = GraphArchive(archive_path)
+
+    rows_queue = multiprocessing.Queue(queue_size)
+    graphs_queue = multiprocessing.Queue(queue_size)
+    results_queue = multiprocessing.Queue()
+
+    processes = [
+        multiprocessing.Process(
+            target=enumerate_rows,
+            args=(rows_queue, n, edges, new_constraints, generators),
+        )
+    ]
+    processes += [
+        multiprocessing.Process(
+            target=generate_graphs,
+            args=(
+                rows_queue,
+                graphs_queue,
+                results_queue,
+                seed,
+                max_attempts,
+                construction,
+            ),
+        )
+        for _ in range(generators)
+    ]
+    processes += [
+        multiprocessing.Process(
+            target=verify_graphs,
+            args=(
+                graphs_queue, results_queue, verify_options, cache_path, archive_all
+            ),
+        )
+        for _ in range(verifiers)
+    ]
+
+    start_time = time.time()
+    for process in processes:
+        process.start()
+
+    rows_done = 0
+    broadcast_graphs_found = 0
+    first_result_time = None
+    generators_running = generators
+    verifiers_running = verifiers
+
+    try:
+        while verifiers_running > 0:
+            try:
+                result = results_queue.get(timeout=1)
+            except queue.Empty:
+                for process in processes:
+                    if process.exitcode not in (None, 0):
+                        raise RuntimeError("A pipeline process failed")
+                continue
+
+            if result == generator_finished:
+                # Once every row has a graph, the verifiers stop after the last graph
+                generators_running -= 1
+                if generators_running == 0:
+                    for _ in range(verifiers):
+                        graphs_queue.put(_stop)
+                continue
+
+            if result == verifier_finished:
+                verifiers_running -= 1
+                continue
+
+            if first_result_time is None:
+                first_result_time = time.time() - start_time
+                print(f"First row done after {first_result_time:.3f} seconds")
+
+            rows_done += 1
+            broadcast_graphs_found += ProcessIntegerSolutions.report_result(
+                result, cache, archive, archive_all
+            )
+
+            if rows_done % 100 == 0:
+                if cache is not None:
+                    cache.save()
+
+                runtime = time.time() - start_time
+                print(f"{rows_done} rows, {rows_done / runtime:.2f} rows/sec")
+    finally:
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+            process.join()
+
+    if cache is not None:
+        cache.save()
+
+    runtime = time.time() - start_time
+    print("Broadcast graphs found:", broadcast_graphs_found)
+    print(f"Runtime: {runtime:.3f} seconds, {rows_done / runtime:.2f} rows/sec")
+
+
+# Puts every row of the enumeration on the rows queue with its index, in the order of
+# the integer solutions file
+def enumerate_rows(rows_queue, n, edges, new_constraints, generators):
+    solutions = PrintIntegerSolutions.enumerate_solutions(n, edges, new_constraints)
+    row_index = 0
+
+    while True:
+        with Instrumentation.timer("enumerate"):
+            solution = next(solutions, None)
+        if solution is None:
+            break
+
+        # Time spent waiting for the generators to take rows
+        with Instrumentation.timer("rows queue wait"):
+            rows_queue.put((row_index, list(solution)))
+        row_index += 1
+        Instrumentation.flush_every()
+
+    for _ in range(generators):
+        rows_queue.put(_stop)
+
+
+# Builds the graph of every row taken from the rows queue, graphs go on to the graphs
+# queue and rows without a graph go straight to the results
+def generate_graphs(
+    rows_queue, graphs_queue, results_queue, seed, max_attempts, construction
+):
+    while True:
+        row = rows_queue.get()
+        if row is _stop:
+            break
+
+        row_index, dataset = row
+        result, G = ProcessIntegerSolutions.generate_row_graph(
+            row_index, dataset, seed, max_attempts, construction
+        )
+
+        # Verification continues the random stream of the row, as it does in
+        # ProcessIntegerSolutions.process_row()
+        if G is None:
+            results_queue.put(result)
+        else:
+            with Instrumentation.timer("graphs queue wait"):
+                graphs_queue.put((result, G, random.getstate()))
+        Instrumentation.flush_every()
+
+    results_queue.put(generator_finished)
+
+
+# Verifies every graph taken from the graphs queue, with its own cache, source
+# statistics and attempt budget like a ProcessIntegerSolutions worker
+def verify_graphs(
+    graphs_queue, results_queue, verify_options, cache_path, archive_all=False
+):
+    ProcessIntegerSolutions._init_worker(cache_path, archive_all)
+
+    while True:
+        item = graphs_queue.get()
+        if item is _stop:
+            break
+
+        result, G, random_state = item
+        random.setstate(random_state)
+        results_queue.put(
+            ProcessIntegerSolutions.verify_row_graph(result, G, verify_options)
+        )
+        Instrumentation.flush_every()
+
+    results_queue.put(verifier_finished)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--n", type=int, default=24)
+    parser.add_argument("--edges", type=int, default=35)
+    parser.add_argument("--old-constraints-only", action="store_true")
+    parser.add_argument("--generators", type=int, default=1)
+    parser.add_argument("--verifiers", type=int, default=None)
+    parser.add_argument("--queue-size", type=int, default=64)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--max-attempts", type=int, default=1000)
+    parser.add_argument("--batch-size", type=int, default=None)
+    parser.add_argument("--exact-fallback", action="store_true")
+    parser.add_argument("--use-orbits", action="store_true")
+    parser.add_argument("--source-order", choices=["label", "risk"], default="label")
+    parser.add_argument("--adaptive", action="store_true")
+    parser.add_argument("--cache", default=None)
+    parser.add_argument(
+        "--archive", default=ProcessIntegerSolutions.saved_graph_file_name
+    )
+    parser.add_argument("--archive-all", action="store_true")
+    parser.add_argument(
+        "--construction",
+        choices=["random", "incremental", "exact"],
+        default="random",
+    )
+    args = parser.parse_args()
+
+    main(
+        n=args.n,
+        edges=args.edges,
+        new_constraints=PrintIntegerSolutions.check_new_constraints_flag
+        and not args.old_constraints_only,
+        generators=args.generators,
+        verifiers=args.verifiers,
+        queue_size=args.queue_size,
+        seed=args.seed,
+        max_attempts=args.max_attempts,
+        verify_options={
+            "batch_size": args.batch_size,
+            "exact_fallback": args.exact_fallback,
+            "use_orbits": args.use_orbits,
+            "source_order": args.source_order,
+            "adaptive": args.adaptive,
+        },
+        cache_path=args.cache,
+        construction=args.construction,
+        archive_path=args.archive,
+        archive_all=args.archive_all,
+    )
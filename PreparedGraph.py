@@ -0,0 +1,66 @@
+import networkx as nx
+from collections import deque
+
+
+"""
+Compiles a networkx graph into flat adjacency lists so the broadcast tree algorithms
+can run without any networkx lookups in their inner loops
+"""
+
+
+# Array-backed form of a graph with nodes labelled 0 to n - 1
+# neighbors[v] lists the neighbours of v in the same order networkx iterates them,
+# offsets / flat_neighbors store the same adjacency in CSR form, and degree[v] is
+# the degree of v. cache holds structures other modules derive from the graph
+class PreparedGraph:
+    def __init__(self, G):
+        # The algorithms index lists by node, so nodes must be 0 to n - 1
+        if set(G.nodes) != set(range(G.number_of_nodes())):
+            G = nx.convert_node_labels_to_integers(G)
+
+        self.graph = G
+        self.number_of_nodes = G.number_of_nodes()
+
+        self.neighbors = [
+            tuple(G.neighbors(node)) for node in range(self.number_of_nodes)
+        ]
+        self.degree = [len(node_neighbors) for node_neighbors in self.neighbors]
+
+        self.offsets = [0]
+        self.flat_neighbors = []
+        for node_neighbors in self.neighbors:
+            self.flat_neighbors.extend(node_neighbors)
+            self.offsets.append(len(self.flat_neighbors))
+
+        self.cache = {}
+
+    def nodes(self):
+        return range(self.number_of_nodes)
+
+    # Returns the number of vertices at each distance from source, starting with the
+    # source itself at distance 0
+    def get_layer_counts(self, source):
+        distances = [None] * self.number_of_nodes
+        distances[source] = 0
+        layer_counts = [1]
+        queue = deque([source])
+
+        while queue:
+            current_node = queue.popleft()
+            for neighbor in self.neighbors[current_node]:
+                if distances[neighbor] is None:
+                    distances[neighbor] = distances[current_node] + 1
+                    if distances[neighbor] == len(layer_counts):
+                        layer_counts.append(0)
+                    layer_counts[distances[neighbor]] += 1
+                    queue.append(neighbor)
+
+        return layer_counts
+
+
+# Returns the prepared form of G, building it only if G is still a networkx graph
+def prepare_graph(G):
+    if isinstance(G, PreparedGraph):
+        return G
+
+    return PreparedGraph(G)
@@ -1,4 +1,11 @@
+import argparse
+import numpy as np
+import os
 import time
+import SolutionConstraints
+import SolutionStore
+import VectorizedConstraints
+from concurrent.futures import ProcessPoolExecutor
 
 
 """
@@ -10,24 +17,80 @@ Stores integer solutions of contraints in an output file
 check_new_constraints_flag = True
 
 file_name = "Integer Solutions.txt"
-solution_count = 0
-file_writer = None
 
+header = " v2 | v3 | v4 | v5 | v6plus | delta | e23 | e24 | e25plus | e33 | e34 | e35plus | e44 | e45plus | e55plus \n"
+
+
+# Writes found solutions to .txt file, for graphs with n vertices and the given edges
+# The vertex profiles are split into shards of shard_size profiles, which are searched
+# across workers processes, each writing its own file. The shard files are then merged
+# in order, so the output is the same as a single process would write
+# With vectorized, the constraints are checked on blocks of candidates with NumPy, see
+# VectorizedConstraints.py
+# If output_file_name ends with .bin, the solutions are written as a SolutionStore
+# instead of a text file
+def main(
+    n=24,
+    edges=35,
+    output_file_name=file_name,
+    workers=None,
+    shard_size=8,
+    new_constraints=check_new_constraints_flag,
+    vectorized=False,
+):
+    start_time = time.time()
 
-# Writes found solutions to .txt file
-def main():
-    global solution_count
-    global file_writer
+    if workers is None:
+        workers = os.cpu_count()
+
+    binary = output_file_name.endswith(".bin")
+
+    if vectorized:
+        profiles = VectorizedConstraints.get_vertex_profiles(
+            n, edges, new_constraints
+        ).tolist()
+    else:
+        profiles = list(enumerate_vertices(n, edges, new_constraints))
+    shards = [
+        (
+            profiles[i : i + shard_size],
+            n,
+            edges,
+            new_constraints,
+            output_file_name + ".shard" + str(i // shard_size),
+            vectorized,
+            binary,
+        )
+        for i in range(0, len(profiles), shard_size)
+    ]
 
-    start_time = time.time()
+    if workers <= 1:
+        shard_counts = [write_shard(*shard) for shard in shards]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            shard_counts = list(executor.map(write_shard, *zip(*shards)))
 
-    file_writer = open(file_name, "w")
+    solution_count = sum(shard_counts)
 
-    file_writer.write(
-        " v2 | v3 | v4 | v5 | v6plus | delta | e23 | e24 | e25plus | e33 | e34 | e35plus | e44 | e45plus | e55plus \n"
-    )
+    if binary:
+        with SolutionStore.SolutionWriter(output_file_name, n, edges) as store_writer:
+            for shard in shards:
+                store_writer.append_file(shard[4])
+                os.remove(shard[4])
+
+        print("Total count: " + str(solution_count))
+        print(f"Runtime: {time.time() - start_time:.3f} seconds")
+        return
+
+    file_writer = open(output_file_name, "w")
+    file_writer.write(header)
 
-    check_vertices()
+    for shard in shards:
+        shard_file_name = shard[4]
+        with open(shard_file_name, "r") as shard_reader:
+            for line in shard_reader:
+                file_writer.write(line)
+        os.remove(shard_file_name)
 
     file_writer.write("\nTotal count: " + str(solution_count))
     print("Total count: " + str(solution_count))
@@ -41,16 +104,131 @@ def main():
     file_writer.close()
 
 
-# Makes sure the number of vertices is 24, and makes sure the total degree is 70
-def check_vertices():
-    for v2 in range((24) + 1):
-        for v3 in range((24 - v2) + 1):
-            for v4 in range((24 - v2 - v3) + 1):
-                for v5 in range((24 - v2 - v3 - v4) + 1):
-                    v6plus = 24 - v2 - v3 - v4 - v5
+# Writes the solutions of the given vertex profiles to their own file, returns how many
+# solutions were written. With binary, the rows are written with
+# SolutionStore.write_rows()
+def write_shard(
+    profiles,
+    n,
+    edges,
+    new_constraints,
+    shard_file_name,
+    vectorized=False,
+    binary=False,
+):
+    if binary:
+        value_dtype = SolutionStore.get_value_dtype(n, edges)
+        solution_count = 0
+
+        with open(shard_file_name, "wb") as file_writer:
+            if vectorized:
+                for block in VectorizedConstraints.get_solution_blocks(
+                    profiles, n, edges, new_constraints
+                ):
+                    solution_count += len(block)
+                    SolutionStore.write_rows(
+                        file_writer, block.view(np.int64), value_dtype
+                    )
+            else:
+                for v2, v3, v4, v5, v6plus, delta in profiles:
+                    solutions = list(
+                        enumerate_edges(
+                            v2, v3, v4, v5, v6plus, delta, edges, new_constraints
+                        )
+                    )
+                    solution_count += len(solutions)
+                    SolutionStore.write_rows(file_writer, solutions, value_dtype)
+
+        return solution_count
+
+    if vectorized:
+        with open(shard_file_name, "w") as file_writer:
+            return VectorizedConstraints.write_solutions(
+                file_writer, profiles, n, edges, new_constraints
+            )
+
+    solution_count = 0
+
+    with open(shard_file_name, "w") as file_writer:
+        for v2, v3, v4, v5, v6plus, delta in profiles:
+            for solution in enumerate_edges(
+                v2, v3, v4, v5, v6plus, delta, edges, new_constraints
+            ):
+                solution_count += 1
+                file_writer.write(format_solution(solution))
+
+    return solution_count
+
+
+def format_solution(solution):
+    v2, v3, v4, v5, v6plus, delta, e23, e24, e25plus, e33, e34, e35plus, e44, e45plus, e55plus = solution
+    return f" {v2:2} | {v3:2} | {v4:2} | {v5:2} | {v6plus:6} | {delta:5} | {e23:3} | {e24:3} | {e25plus:7} | {e33:3} | {e34:3} | {e35plus:7} | {e44:3} | {e45plus:7} | {e55plus:7} \n"
+
+
+# Yields every solution as a tuple in the order of the output file
+# Every constraint of SolutionConstraints is checked in the outermost loop where all of
+# its values are known, and the loop ranges are narrowed by the constraints bounding
+# their value, so only the vertex profiles and edge counts that can still lead to a
+# solution are visited
+def enumerate_solutions(n=24, edges=35, new_constraints=True):
+    for v2, v3, v4, v5, v6plus, delta in enumerate_vertices(n, edges, new_constraints):
+        yield from enumerate_edges(
+            v2, v3, v4, v5, v6plus, delta, edges, new_constraints
+        )
+
+
+# Makes sure the number of vertices is n, and makes sure the total degree is 2 * edges
+# The new constraints are only known for n = 24 with 35 edges
+def enumerate_vertices(n=24, edges=35, new_constraints=True):
+    constraints = SolutionConstraints.get_constraints(n, edges, new_constraints)
+    passes = SolutionConstraints.passes
+    total_degree = 2 * edges
+    s = {}
+
+    # The new constraints bound 9 <= v2 <= 12, 3 <= v3 <= 11 and v3 >= 27 - 2 * v2
+    v2_range = range(9, 12 + 1) if new_constraints else range((n) + 1)
+
+    for v2 in v2_range:
+        s["v2"] = v2
+        if not passes(constraints, "v2", s):
+            continue
+
+        v3_range = range((n - v2) + 1)
+        if new_constraints:
+            v3_range = range(max(3, 27 - 2 * v2), min(11, n - v2) + 1)
+
+        for v3 in v3_range:
+            s["v3"] = v3
+            if not passes(constraints, "v3", s):
+                continue
+
+            for v4 in range((n - v2 - v3) + 1):
+                s["v4"] = v4
+                if not passes(constraints, "v4", s):
+                    continue
+
+                for v5 in range((n - v2 - v3 - v4) + 1):
+                    v6plus = n - v2 - v3 - v4 - v5
+                    s["v5"] = v5
+                    s["v6plus"] = v6plus
+                    if not passes(constraints, "v5", s):
+                        continue
 
                     if v6plus > 0:
-                        for delta in range(6, (23) + 1):
+                        # The new constraints bound delta by v2, v3 and v4plus
+                        highest_delta = n - 1
+                        if new_constraints:
+                            v4plus = SolutionConstraints.v4plus(s)
+                            highest_delta = min(
+                                8,
+                                v2 - 2,
+                                v2 + 2 - v4plus,
+                                2 * v2 + v3 - 22,
+                                v3 + 2,
+                                14 - v4plus,
+                            )
+
+                        for delta in range(6, highest_delta + 1):
                             if (
                                 2 * v2
                                 + 3 * v3
@@ -58,34 +236,75 @@ def check_vertices():
                                 + 5 * v5
                                 + 6 * (v6plus - 1)
                                 + delta * 1
-                                <= 70
+                                <= total_degree
                             ):
                                 if (
                                     2 * v2 + 3 * v3 + 4 * v4 + 5 * v5 + delta * v6plus
-                                    >= 70
+                                    >= total_degree
                                 ):
-                                    check_edges(v2, v3, v4, v5, v6plus, delta)
+                                    s["delta"] = delta
+                                    if passes(constraints, "delta", s):
+                                        yield v2, v3, v4, v5, v6plus, delta
 
-                    elif 2 * v2 + 3 * v3 + 4 * v4 + 5 * v5 == 70:
+                    elif 2 * v2 + 3 * v3 + 4 * v4 + 5 * v5 == total_degree:
                         delta = 5 if v5 > 0 else (4 if v4 > 0 else 3)
 
-                        check_edges(v2, v3, v4, v5, 0, delta)
+                        s["delta"] = delta
+                        if passes(constraints, "delta", s):
+                            yield v2, v3, v4, v5, 0, delta
 
 
 # Make sure that number of edges agree with degrees of different vertices
-def check_edges(v2, v3, v4, v5, v6plus, delta):
-    for e23 in range(min(2 * v2, 3 * v3) + 1):
-        for e24 in range(min(2 * v2, 4 * v4) + 1):
+# The ranges only go as far as the constraints of SolutionConstraints allow: the ones
+# found by Gabriel Talih keep the graph simple, then come the ones found in "Tight lower
+# bounds on broadcast function for n = 24 and 25" and the new ones conjectured by
+# Mohammad Hossein
+def enumerate_edges(v2, v3, v4, v5, v6plus, delta, edges=35, new_constraints=True):
+    n = v2 + v3 + v4 + v5 + v6plus
+    constraints = SolutionConstraints.get_constraints(n, edges, new_constraints)
+    passes = SolutionConstraints.passes
+    n_choose_2 = SolutionConstraints.n_choose_2
+
+    s = {"v2": v2, "v3": v3, "v4": v4, "v5": v5, "v6plus": v6plus, "delta": delta}
+
+    # e23 <= min(2 * v3, e25plus) and e23 <= v2 * v3
+    for e23 in range(min(2 * v2, 3 * v3, 2 * v3, v2 * v3) + 1):
+        s["e23"] = e23
+        if not passes(constraints, "e23", s):
+            continue
+
+        # e25plus = 2 * v2 - e23 - e24 >= e23, and >= 3 with the new constraints
+        highest_e24 = min(2 * v2, 4 * v4, 3 * v4, v2 * v4, 2 * v2 - 2 * e23)
+        if new_constraints:
+            highest_e24 = min(highest_e24, 2 * v2 - e23 - 3)
+
+        for e24 in range(highest_e24 + 1):
             e25plus = 2 * v2 - e23 - e24
-
-            for e33 in range((3 * v3) // 2 + 1):
-                for e34 in range(min(3 * v3 - 2 * e33 - e23, 4 * v4 - e24) + 1):
+            s["e24"] = e24
+            s["e25plus"] = e25plus
+            if not passes(constraints, "e24", s):
+                continue
+
+            for e33 in range(min((3 * v3) // 2, n_choose_2(v3)) + 1):
+                s["e33"] = e33
+                if not passes(constraints, "e33", s):
+                    continue
+
+                for e34 in range(
+                    min(3 * v3 - 2 * e33 - e23, 4 * v4 - e24, v3 * v4) + 1
+                ):
                     e35plus = 3 * v3 - e23 - 2 * e33 - e34
-
-                    for e44 in range((4 * v4 - e24 - e34) // 2 + 1):
+                    s["e34"] = e34
+                    s["e35plus"] = e35plus
+                    if not passes(constraints, "e34", s):
+                        continue
+
+                    for e44 in range(
+                        min((4 * v4 - e24 - e34) // 2, n_choose_2(v4)) + 1
+                    ):
                         e45plus = 4 * v4 - e24 - e34 - 2 * e44
                         e55plus = (
-                            35
+                            edges
                             - e23
                             - e24
                             - e25plus
@@ -96,241 +315,51 @@ def check_edges(v2, v3, v4, v5, v6plus, delta):
                             - e45plus
                         )
 
-                        if e55plus >= 0:
-                            check_if_simple_graph(
-                                v2,
-                                v3,
-                                v4,
-                                v5,
-                                v6plus,
-                                delta,
-                                e23,
-                                e24,
-                                e25plus,
-                                e33,
-                                e34,
-                                e35plus,
-                                e44,
-                                e45plus,
-                                e55plus,
-                            )
-
-
-# Constraints found by Gabriel Talih
-# Checks if the number of edges gurantees no self-loops or multi-edges
-def check_if_simple_graph(
-    v2,
-    v3,
-    v4,
-    v5,
-    v6plus,
-    delta,
-    e23,
-    e24,
-    e25plus,
-    e33,
-    e34,
-    e35plus,
-    e44,
-    e45plus,
-    e55plus,
-):
-    v5plus = v5 + v6plus
-
-    if not (e33 <= n_choose_2(v3)):
-        return
-
-    if not (e44 <= n_choose_2(v4)):
-        return
-
-    if not (e55plus <= n_choose_2(v5plus)):
-        return
-    
-    # Include this constraint if we are strictly taking e55plus as only v5 connecting to v5plus
-    # if not (e55plus <= n_choose_2(v5) + v5 * v6plus):
-    #     return
-
-    if not (e23 <= v2 * v3):
-        return
-
-    if not (e24 <= v2 * v4):
-        return
-
-    if not (e25plus <= v2 * v5plus):
-        return
-
-    if not (e34 <= v3 * v4):
-        return
-
-    if not (e35plus <= v3 * v5plus):
-        return
-
-    if not (e45plus <= v4 * v5plus):
-        return
-
-    check_old_constraints(
-        v2,
-        v3,
-        v4,
-        v5,
-        v6plus,
-        delta,
-        e23,
-        e24,
-        e25plus,
-        e33,
-        e34,
-        e35plus,
-        e44,
-        e45plus,
-        e55plus,
-    )
-
-
-# Constraints found in "Tight lower bounds on broadcast function for n = 24 and 25"
-def check_old_constraints(
-    v2,
-    v3,
-    v4,
-    v5,
-    v6plus,
-    delta,
-    e23,
-    e24,
-    e25plus,
-    e33,
-    e34,
-    e35plus,
-    e44,
-    e45plus,
-    e55plus,
-):
-    global solution_count
-    global file_writer
-
-    if not (e23 <= min(2 * v3, v3 + e34 + e35plus, e25plus)):
-        return
-
-    if not (e24 <= min(3 * v4, 3 * v4 - ceiling_divide(v2 - e25plus, 2))):
-        return
-
-    if not (e25plus <= 4 * v5 + v6plus * (delta - 1) - ceiling_divide(e23, delta - 2)):
-        return
-
-    if not (e45plus + e55plus >= ceiling_divide(e23, delta - 2)):
-        return
-
-    if check_new_constraints_flag:
-        return check_new_constraints(
-            v2,
-            v3,
-            v4,
-            v5,
-            v6plus,
-            delta,
-            e23,
-            e24,
-            e25plus,
-            e33,
-            e34,
-            e35plus,
-            e44,
-            e45plus,
-            e55plus,
-        )
-
-    solution_count += 1
-    file_writer.write(
-        f" {v2:2} | {v3:2} | {v4:2} | {v5:2} | {v6plus:6} | {delta:5} | {e23:3} | {e24:3} | {e25plus:7} | {e33:3} | {e34:3} | {e35plus:7} | {e44:3} | {e45plus:7} | {e55plus:7} \n"
-    )
-
-
-# New constraints conjectured by Mohammad Hossein
-def check_new_constraints(
-    v2,
-    v3,
-    v4,
-    v5,
-    v6plus,
-    delta,
-    e23,
-    e24,
-    e25plus,
-    e33,
-    e34,
-    e35plus,
-    e44,
-    e45plus,
-    e55plus,
-):
-    global solution_count
-    global file_writer
-
-    v4plus = v4 + v5 + v6plus
-
-    if not (9 <= v2 <= 12):
-        return
-
-    if not (5 <= delta <= 8):
-        return
-
-    if not (4 <= v4plus <= 9):
-        return
-
-    if not (3 <= v3 <= 11):
-        return
-
-    if not (v2 <= 6 * v4 - 2 * e24 + e25plus):
-        return
-
-    if not (v3 >= 27 - 2 * v2):
-        return
-
-    if not (2 * v2 <= e24 + 2 * e25plus):
-        return
-
-    if not (delta <= v2 - 2):
-        return
-
-    if not (5 * v2 <= 6 * v4 + 5 * e25plus):
-        return
-
-    if not (
-        v4plus < v2 - 3
-        or (v3 == 27 - 2 * v2 and v4 == v2 - 4 and v5 == 1 and v6plus == 0)
-    ):
-        return
-
-    if not (e25plus >= 3):
-        return
-
-    if not (delta + v4plus <= v2 + 2):
-        return
-
-    if not (delta <= 2 * v2 + v3 - 22):
-        return
-
-    if not (delta <= v3 + 2):
-        return
-
-    if not (delta + v4plus <= 14):
-        return
-
-    solution_count += 1
-    file_writer.write(
-        f" {v2:2} | {v3:2} | {v4:2} | {v5:2} | {v6plus:6} | {delta:5} | {e23:3} | {e24:3} | {e25plus:7} | {e33:3} | {e34:3} | {e35plus:7} | {e44:3} | {e45plus:7} | {e55plus:7} \n"
-    )
-
-
-# preforms ceiling(a / b) but cleaner
-def ceiling_divide(a, b):
-    return (a + b - 1) // b
-
-
-# preforms n choose 2
-def n_choose_2(n):
-    return (n * (n - 1)) // 2
+                        if e55plus < 0:
+                            continue
+
+                        s["e44"] = e44
+                        s["e45plus"] = e45plus
+                        s["e55plus"] = e55plus
+                        if not passes(constraints, "e44", s):
+                            continue
+
+                        yield (
+                            v2,
+                            v3,
+                            v4,
+                            v5,
+                            v6plus,
+                            delta,
+                            e23,
+                            e24,
+                            e25plus,
+                            e33,
+                            e34,
+                            e35plus,
+                            e44,
+                            e45plus,
+                            e55plus,
+                        )
 
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--n", type=int, default=24)
+    parser.add_argument("--edges", type=int, default=35)
+    parser.add_argument("--output", default=file_name)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--shard-size", type=int, default=8)
+    parser.add_argument("--old-constraints-only", action="store_true")
+    parser.add_argument("--vectorized", action="store_true")
+    args = parser.parse_args()
+
+    main(
+        n=args.n,
+        edges=args.edges,
+        output_file_name=args.output,
+        workers=args.workers,
+        shard_size=args.shard_size,
+        new_constraints=check_new_constraints_flag and not args.old_constraints_only,
+        vectorized=args.vectorized,
+    )
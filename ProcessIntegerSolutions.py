@@ -1,49 +1,530 @@
 import networkx as nx
+import numpy as np
 import GenerateGraph
+import ExactRealization
+from RealizationEnumerator import RealizationEnumerator
 import CheckBroadcastTime
-import pickle
+import Instrumentation
+from VerifiedGraphCache import VerifiedGraphCache
+from SourceScheduling import SourceStatistics
+from AdaptiveBudget import AdaptiveBudget
+import SolutionStore
+from GraphArchive import GraphArchive
+from ProgressJournal import ProgressJournal
+import argparse
+import itertools
+import math
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
 
 
 """
-Reads Integer Solutions.txt and attempts to make a valid graph, which is then tested to see if it is as broadcast graph
+Reads Integer Solutions.txt (or a SolutionStore) and attempts to make a valid graph, which is then tested to see if it is as broadcast graph
 """
 
 
-def main():
+file_path = "Integer Solutions.txt"
+saved_graph_file_name = "B24_35 edges.g6"
 
-    file_path = "Integer Solutions.txt"
+# Cache of verified graphs used by process_row(), one copy per worker process
+_cache = None
+
+# Whether results carry the graphs that are not broadcast graphs, for archive_all
+_archive_all = False
+
+
+# verify_options are passed on to CheckBroadcastTime.is_broadcast_graph()
+# Set cache_path to skip graphs isomorphic to ones verified in this or earlier runs
+# construction is "random", "incremental" (random, stopping at dead ends early),
+# "exact" to build graphs with ExactRealization or "exhaustive" to verify every
+# realization up to isomorphism, at most max_attempts of them
+# solutions_path is a text file or a SolutionStore, where limits the rows processed to
+# the ones matching SolutionStore.SolutionStore.query(**where)
+# With journal_path, the outcome of every row is written to a ProgressJournal. With
+# resume, the rows of an existing journal are skipped and its seed is used again
+# Broadcast graphs are added to the GraphArchive at archive_path, with archive_all every
+# verified graph is
+def main(
+    workers=None,
+    seed=None,
+    max_attempts=1000,
+    shard_size=16,
+    verify_options=None,
+    cache_path=None,
+    construction="random",
+    solutions_path=file_path,
+    where=None,
+    journal_path=None,
+    resume=False,
+    archive_path=saved_graph_file_name,
+    archive_all=False,
+):
+    rows = read_rows(solutions_path, where)
+
+    if verify_options is None:
+        verify_options = {}
+
+    cache = None
+    if cache_path is not None:
+        cache = VerifiedGraphCache(cache_path)
+        print("Cached graphs:", len(cache))
+
+    journal = None
+    if journal_path is not None:
+        journal = ProgressJournal(journal_path, resume)
+        if seed is None and journal.run_options is not None:
+            seed = journal.run_options["seed"]
+
+    # Every row draws from its own stream derived from the run seed, so a row gives the
+    # same graphs no matter which worker it lands on
+    if seed is None:
+        seed = np.random.SeedSequence().entropy
+    print("Seed:", seed)
+
+    broadcast_graphs_found = 0
+    if journal is not None:
+        journal.start(
+            {
+                "seed": seed,
+                "max_attempts": max_attempts,
+                "verify_options": verify_options,
+                "construction": construction,
+                "solutions_path": solutions_path,
+                "where": {
+                    column: (
+                        [condition.start, condition.stop - 1]
+                        if isinstance(condition, range)
+                        else condition
+                    )
+                    for column, condition in (where or {}).items()
+                },
+            }
+        )
+
+        print("Rows done before:", len(journal))
+        broadcast_graphs_found = sum(
+            entry["outcome"] == "broadcast" for entry in journal.completed.values()
+        )
+        rows = [row for row in rows if not journal.is_completed(row[0])]
+
+    archive = GraphArchive(archive_path)
+
+    # A run stopped after archiving a graph but before journalling its row processes the
+    # row again when resumed, which gives the same graph, so it is not archived twice
+    archived_rows = set()
+    if journal is not None and resume:
+        archived_rows = archive.get_archived_rows()
+
+    if workers is None:
+        workers = os.cpu_count()
+
+    shards = [rows[i : i + shard_size] for i in range(0, len(rows), shard_size)]
+
+    start_time = time.time()
+    rows_done = 0
+
+    for results in process_shards(
+        shards,
+        seed,
+        max_attempts,
+        verify_options,
+        workers,
+        cache_path,
+        construction,
+        archive_all,
+    ):
+        for result in results:
+            rows_done += 1
+            broadcast_graphs_found += report_result(
+                result, cache, archive, archive_all, archived_rows
+            )
+
+            if journal is not None:
+                journal.record(result)
+
+        if cache is not None:
+            cache.save()
+
+        if journal is not None:
+            journal.sync()
+
+        runtime = time.time() - start_time
+        print(f"{rows_done}/{len(rows)} rows, {rows_done / runtime:.2f} rows/sec")
+
+    if journal is not None:
+        journal.close()
+
+    runtime = time.time() - start_time
+    print("Broadcast graphs found:", broadcast_graphs_found)
+    print(f"Runtime: {runtime:.3f} seconds, {len(rows) / runtime:.2f} rows/sec")
 
-    with open(file_path, "r") as file:
-        lines = file.readlines()
+
+# Prints the outcome of a row, adds its cache entries to cache (if any) and adds the
+# graph to archive (a GraphArchive, if any) if it is a broadcast graph, or whenever it
+# was verified with archive_all. Rows whose (row, seed) is in archived_rows are not
+# archived again. Returns 1 for a broadcast graph, 0 otherwise
+def report_result(
+    result, cache=None, archive=None, archive_all=False, archived_rows=()
+):
+    if cache is not None:
+        cache.add_entries(result["cache_entries"])
+
+    if (
+        archive is not None
+        and "graph" in result
+        and (result["outcome"] == "broadcast" or archive_all)
+        and (result["row"], result["seed"]) not in archived_rows
+    ):
+        G = result["graph"]
+        archive.append(
+            G,
+            row=result["row"],
+            seed=result["seed"],
+            verdict=result["outcome"] == "broadcast",
+            broadcast_time=math.ceil(math.log2(G.number_of_nodes())),
+        )
+
+    print("---------------------------")
+    print("Row", result["row"])
+
+    if result["outcome"] == "error":
+        # prints the error
+        print(result["error"])
+        return 0
+
+    if result["outcome"] == "non broadcast" and result.get("exhausted"):
+        print("None of the", result["attempts"], "realizations is a broadcast graph")
+        return 0
+
+    if result["outcome"] == "non broadcast":
+        print(f"Found a non broadcast graph (confidence {result['confidence']:.3f})")
+        return 0
+
+    print("Found a broadcast graph!")
+    return 1
+
+
+# Reads the rows of an integer solutions file or SolutionStore as lists of 15 integers
+def read_solutions(file_path):
+    if SolutionStore.is_solution_store(file_path):
+        return SolutionStore.SolutionStore(file_path, load_index=False).read_all()
 
     data = []
-    for line in lines[1:-3]:  # Skips the header and last three lines
-        values = [int(value.strip()) for value in line.split("|") if value.strip()]
-        data.append(values)
+    with open(file_path, "r") as file:
+        next(file)  # Skips the header
+
+        # The rows end at the blank line before the total count and runtime
+        for line in file:
+            if not line.strip():
+                break
+
+            values = [int(value.strip()) for value in line.split("|") if value.strip()]
+            data.append(values)
+
+    return data
+
+
+# Returns (row index, row) for the rows matching where, a dictionary from columns to
+# a value or a range of values. A SolutionStore only reads the matching rows
+def read_rows(file_path, where=None):
+    if where is None:
+        where = {}
+
+    if SolutionStore.is_solution_store(file_path):
+        store = SolutionStore.SolutionStore(file_path)
+        return [(int(row_index), store[row_index]) for row_index in store.query(**where)]
+
+    rows = []
+    for row_index, values in enumerate(read_solutions(file_path)):
+        if all(
+            values[SolutionStore.columns.index(column)]
+            in (condition if isinstance(condition, range) else [condition])
+            for column, condition in where.items()
+        ):
+            rows.append((row_index, values))
+
+    return rows
+
+
+# Reads a --where condition such as "delta=5" or "v3=3..5"
+def parse_condition(text):
+    column, value = text.split("=")
+    if ".." in value:
+        lowest, highest = value.split("..")
+        return column.strip(), range(int(lowest), int(highest) + 1)
+
+    return column.strip(), int(value)
 
-    for dataset in data:
-        print("---------------------------")
+
+# Returns the results of every shard, in the order the shards finish
+# With archive_all, the results of graphs that are not broadcast graphs also carry them
+def process_shards(
+    shards,
+    seed,
+    max_attempts,
+    verify_options,
+    workers,
+    cache_path=None,
+    construction="random",
+    archive_all=False,
+):
+    if workers <= 1:
+        _init_worker(cache_path, archive_all)
+        for shard in shards:
+            yield process_shard(shard, seed, max_attempts, verify_options, construction)
+        return
+
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_worker,
+        initargs=(cache_path, archive_all),
+    ) as executor:
+        futures = [
+            executor.submit(
+                process_shard, shard, seed, max_attempts, verify_options, construction
+            )
+            for shard in shards
+        ]
+
+        for future in as_completed(futures):
+            yield future.result()
+
+
+def _init_worker(cache_path, archive_all=False):
+    global _cache
+    global _archive_all
+
+    _cache = None
+    if cache_path is not None:
+        _cache = VerifiedGraphCache(cache_path)
+
+    _archive_all = archive_all
+
+
+def process_shard(shard, seed, max_attempts, verify_options, construction="random"):
+    results = [
+        process_row(
+            row_index, dataset, seed, max_attempts, verify_options, construction
+        )
+        for row_index, dataset in shard
+    ]
+
+    Instrumentation.flush_every()
+    return results
+
+
+# Seed of the random stream used for a row of a run
+def get_row_seed(seed, row_index):
+    return int(np.random.SeedSequence([seed, row_index]).generate_state(1)[0])
+
+
+# Generates a graph for a row and tests if it is a broadcast graph
+# Returns a dictionary with the row, its seed, the generation attempts used, the outcome
+# ("error", "non broadcast" or "broadcast") and the error or the broadcast graph, verified
+# graphs also get the confidence of their verdict
+# When a cache is loaded, the entries it gained are returned under "cache_entries"
+# With the "exact" construction, the graph comes from ExactRealization, whose error tells
+# when no graph realizes the row, and only rows it can not decide are built randomly
+# With the "exhaustive" construction, see process_realizations()
+def process_row(
+    row_index,
+    dataset,
+    seed,
+    max_attempts=1000,
+    verify_options=None,
+    construction="random",
+):
+    if verify_options is None:
+        verify_options = {}
+
+    if construction == "exhaustive":
+        result = start_row(row_index, seed)
+        return process_realizations(result, dataset, max_attempts, verify_options)
+
+    result, G = generate_row_graph(row_index, dataset, seed, max_attempts, construction)
+    if G is None:
+        return result
+
+    return verify_row_graph(result, G, verify_options)
+
+
+# Seeds the random stream of a row and returns its result before any graph is built
+def start_row(row_index, seed):
+    row_seed = get_row_seed(seed, row_index)
+    random.seed(row_seed)
+
+    return {"row": row_index, "seed": row_seed, "attempts": 0, "cache_entries": []}
+
+
+# Builds the graph of a row like process_row(), returns its result and the graph, or the
+# result with its error and None
+def generate_row_graph(
+    row_index, dataset, seed, max_attempts=1000, construction="random"
+):
+    result = start_row(row_index, seed)
+
+    with Instrumentation.timer("generate"):
         G = None
-        max_attempts = 1000
+        if construction == "exact":
+            G = ExactRealization.create_exact_graph(dataset)
+
+        # Rows the exact search could not decide still get the random constructions
+        if construction != "exact" or G == ExactRealization.search_stopped_error:
+            while not isinstance(G, nx.Graph) and result["attempts"] <= max_attempts:
+                result["attempts"] += 1
+                G = GenerateGraph.create_random_graph(
+                    dataset, incremental=construction == "incremental"
+                )
+
+                # Some errors come with a value, only the message is counted
+                if Instrumentation.enabled and not isinstance(G, nx.Graph):
+                    Instrumentation.count(
+                        "rejected: " + (G[0] if isinstance(G, tuple) else G)
+                    )
+
+    if not isinstance(G, nx.Graph):
+        result["outcome"] = "error"
+        result["error"] = G
+        return result, None
+
+    return result, G
+
+
+# Verifies the graph built for a row and completes its result, which also gets the graph
+# if it is a broadcast graph, or always when the worker archives every graph
+def verify_row_graph(result, G, verify_options):
+    with Instrumentation.timer("verify"):
+        verdict, result["confidence"] = verify_graph(
+            G, verify_options, np.random.default_rng(result["seed"])
+        )
+
+    # Graphs are only sent back to the main process when they will be archived
+    if verdict or _archive_all:
+        result["graph"] = G
+
+    if _cache is not None:
+        result["cache_entries"] = _cache.take_new_entries()
+
+    if not verdict:
+        result["outcome"] = "non broadcast"
+        return result
+
+    result["outcome"] = "broadcast"
+    return result
 
-        while not isinstance(G, nx.Graph) and max_attempts >= 0:
-            max_attempts -= 1
-            G = GenerateGraph.create_random_graph(dataset)
 
-        if not isinstance(G, nx.Graph):
-            # prints the error
-            print(G)
-            continue
+# Verifies the realizations of a row one at a time from a RealizationEnumerator, until
+# a broadcast graph is found or max_attempts of them were verified
+# The result also tells if every realization was verified under "exhausted", its
+# confidence is the lowest of all the graphs found to not be broadcast graphs
+def process_realizations(result, dataset, max_attempts, verify_options):
+    enumerator = RealizationEnumerator(dataset)
+    result["outcome"] = "non broadcast"
+    result["confidence"] = 1.0
+    rng = np.random.default_rng(result["seed"])
 
-        if not CheckBroadcastTime.is_broadcast_graph(G):
-            print("Found a non broadcast graph")
-            continue
+    # The realizations of a row learn from the ones verified before them, in the same
+    # order on every run
+    source_statistics = SourceStatistics()
+    adaptive_budget = AdaptiveBudget()
 
-        print("Found a broadcast graph!")
-        file_name = "B24_35 edges.pkl"
-        with open(file_name, "wb") as file:
-            pickle.dump(G, file)
+    for G in itertools.islice(enumerator, max_attempts):
+        result["attempts"] += 1
+        with Instrumentation.timer("verify"):
+            verdict, confidence = verify_graph(
+                G, verify_options, rng, source_statistics, adaptive_budget
+            )
+
+        if verdict:
+            result["outcome"] = "broadcast"
+            result["graph"] = G
+            break
+
+        result["confidence"] = min(result["confidence"], confidence)
+
+    result["exhausted"] = enumerator.finished
+    if result["attempts"] == 0 and enumerator.finished:
+        result["outcome"] = "error"
+        result["error"] = "No graph realizes the row"
+
+    if _cache is not None:
+        result["cache_entries"] = _cache.take_new_entries()
+
+    return result
+
+
+# Returns the verdict of CheckBroadcastTime.is_broadcast_graph() for G with its
+# confidence, using the cache of this process
+# rng is the numpy Generator of the batched trials, seeded from the row so batched runs
+# can be repeated like the others
+# The source statistics and attempt budget only learn from the graphs of the same row,
+# passed in by the caller, or are new for this graph when None. Learning across rows
+# would make a row depend on the rows its worker handled before it
+def verify_graph(
+    G, verify_options, rng=None, source_statistics=None, adaptive_budget=None
+):
+    verify_options = dict(verify_options)
+    verify_options["rng"] = rng
+    if verify_options.get("source_order") == "risk":
+        if source_statistics is None:
+            source_statistics = SourceStatistics()
+        verify_options["source_statistics"] = source_statistics
+
+    if verify_options.pop("adaptive", False):
+        if adaptive_budget is None:
+            adaptive_budget = AdaptiveBudget()
+        verify_options["adaptive_budget"] = adaptive_budget
+
+    return CheckBroadcastTime.is_broadcast_graph(
+        G, cache=_cache, return_confidence=True, **verify_options
+    )
 
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--max-attempts", type=int, default=1000)
+    parser.add_argument("--shard-size", type=int, default=16)
+    parser.add_argument("--batch-size", type=int, default=None)
+    parser.add_argument("--exact-fallback", action="store_true")
+    parser.add_argument("--use-orbits", action="store_true")
+    parser.add_argument("--source-order", choices=["label", "risk"], default="label")
+    parser.add_argument("--adaptive", action="store_true")
+    parser.add_argument("--cache", default=None)
+    parser.add_argument("--solutions", default=file_path)
+    parser.add_argument("--where", type=parse_condition, action="append", default=[])
+    parser.add_argument("--journal", default=None)
+    parser.add_argument("--resume", action="store_true")
+    parser.add_argument("--archive", default=saved_graph_file_name)
+    parser.add_argument("--archive-all", action="store_true")
+    parser.add_argument(
+        "--construction",
+        choices=["random", "incremental", "exact", "exhaustive"],
+        default="random",
+    )
+    args = parser.parse_args()
+
+    main(
+        workers=args.workers,
+        seed=args.seed,
+        max_attempts=args.max_attempts,
+        shard_size=args.shard_size,
+        verify_options={
+            "batch_size": args.batch_size,
+            "exact_fallback": args.exact_fallback,
+            "use_orbits": args.use_orbits,
+            "source_order": args.source_order,
+            "adaptive": args.adaptive,
+        },
+        cache_path=args.cache,
+        construction=args.construction,
+        solutions_path=args.solutions,
+        where=dict(args.where),
+        journal_path=args.journal,
+        resume=args.resume,
+        archive_path=args.archive,
+        archive_all=args.archive_all,
+    )
@@ -0,0 +1,108 @@
+import json
+import os
+
+
+"""
+Records the outcome of every row of a verification run as it is found, so a run that is
+stopped can be resumed without processing its finished rows again
+"""
+
+
+# The journal is a text file of JSON lines. The first line holds the options of the run,
+# every other line the result of one row: its index, seed, attempts and outcome, with
+# the error, confidence and exhausted flag when the result has them
+# Lines are flushed as they are written and synced to disk by sync(), a line cut short
+# when the run was stopped is ignored when the journal is read again
+# run_options is None until start() is called, unless the journal was resumed
+class ProgressJournal:
+    def __init__(self, file_path, resume=False):
+        self.file_path = file_path
+        self.run_options = None
+        self.completed = {}
+
+        if os.path.exists(file_path):
+            if not resume:
+                raise FileExistsError(
+                    file_path + " already exists, resume the run or remove the journal"
+                )
+
+            self._read()
+
+        self.file = open(file_path, "a")
+
+    def __len__(self):
+        return len(self.completed)
+
+    def _read(self):
+        valid_size = 0
+
+        with open(self.file_path, "rb") as file:
+            for line in file:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    break
+
+                valid_size += len(line)
+                if "run" in entry:
+                    self.run_options = entry["run"]
+                else:
+                    self.completed[entry["row"]] = entry
+
+        # Removes a line cut short, so the next line starts on its own
+        if valid_size < os.path.getsize(self.file_path):
+            with open(self.file_path, "r+b") as file:
+                file.truncate(valid_size)
+
+    # Writes the options of a new run. A resumed run must have the options of the
+    # journal, so its rows get the same seeds and budgets as before
+    def start(self, run_options):
+        run_options = json.loads(json.dumps(run_options))
+
+        if self.run_options is None:
+            self.run_options = run_options
+            self._write_line({"run": run_options})
+            return
+
+        different = [
+            option
+            for option in set(run_options) | set(self.run_options)
+            if run_options.get(option) != self.run_options.get(option)
+        ]
+        if different:
+            raise ValueError(
+                "The journal was written with other values for: "
+                + ", ".join(sorted(different))
+            )
+
+    def _write_line(self, entry):
+        self.file.write(json.dumps(entry) + "\n")
+        self.file.flush()
+
+    def is_completed(self, row_index):
+        return row_index in self.completed
+
+    # Records the result of a row, as returned by ProcessIntegerSolutions.process_row()
+    def record(self, result):
+        entry = {
+            "row": result["row"],
+            "seed": result["seed"],
+            "attempts": result["attempts"],
+            "outcome": result["outcome"],
+        }
+        for key in ("error", "confidence", "exhausted"):
+            if key in result:
+                entry[key] = result[key]
+
+        self.completed[entry["row"]] = entry
+        self._write_line(entry)
+
+    # Makes sure the lines written so far survive the machine stopping
+    def sync(self):
+        self.file.flush()
+        os.fsync(self.file.fileno())
+
+    def close(self):
+        if not self.file.closed:
+            self.sync()
+            self.file.close()
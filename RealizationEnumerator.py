@@ -0,0 +1,309 @@
+import networkx as nx
+import GraphSymmetry
+from ExactRealization import vertex_classes, edge_classes
+
+
+"""
+Lists every graph realizing a row of the integer solutions exactly once up to
+isomorphism, instead of sampling random constructions that keep repeating themselves
+"""
+
+
+# Realizations follow the same rules as ExactRealization.create_exact_graph()
+# Vertices are given their neighbours one at a time, the highest degree classes first so
+# the v2 rule and the distances can be checked early on. Unfinished vertices of the same
+# class that are joined to the same finished vertices can still be swapped in any
+# realization, so a vertex only takes the first few vertices of each such block as
+# neighbours. This only removes part of the symmetry: isomorphic realizations are still
+# built in full, and are then rejected by their GraphSymmetry.get_canonical_hash(), so
+# the hashes of the realizations returned are kept, one per realization
+# The search can be stopped after any realization, get_state() returns what is needed to
+# continue it later by passing it back as state
+class RealizationEnumerator:
+    def __init__(self, values, edges=35, state=None):
+        if len(values) != 15:
+            raise ValueError("Array must have exactly 15 elements")
+
+        self.edges = edges
+        v6plus, max_degree = values[4], values[5]
+
+        # Vertices of the highest degree classes come first
+        self.classes = []
+        for class_name, count in reversed(list(zip(vertex_classes, values[:5]))):
+            self.classes.extend([class_name] * count)
+        self.number_of_nodes = len(self.classes)
+
+        # Smallest and largest degree of every vertex, the first v6plus vertex has the
+        # max degree since v6plus vertices are interchangeable
+        self.lowest_degree = []
+        self.highest_degree = []
+        for vertex, class_name in enumerate(self.classes):
+            if class_name != "6plus":
+                degree = vertex_classes.index(class_name) + 2
+                self.lowest_degree.append(degree)
+                self.highest_degree.append(degree)
+            elif vertex == self.classes.index("6plus"):
+                self.lowest_degree.append(max_degree)
+                self.highest_degree.append(max_degree)
+            else:
+                self.lowest_degree.append(6)
+                self.highest_degree.append(max_degree)
+
+        # Edges left to add between every pair of edge classes
+        self.remaining_edges = dict(zip(edge_classes, values[6:]))
+        self.has_max_degree = v6plus > 0 or max_degree == max(
+            self.highest_degree, default=0
+        )
+
+        self.neighbors = [set() for _ in range(self.number_of_nodes)]
+
+        # Choice made for every finished vertex, see get_state()
+        self.path = []
+        self.seen = set()
+        self.finished = False
+        self.resume_path = None
+
+        if state is not None:
+            self.resume_path = state["path"]
+            self.seen = set(state["seen"])
+            self.finished = state["finished"]
+
+    def __iter__(self):
+        if self.finished:
+            return
+
+        if self.edges != sum(self.remaining_edges.values()) or not self.has_max_degree:
+            self.finished = True
+            return
+
+        yield from self._search(0, self.resume_path)
+        self.finished = True
+
+    # Returns the state after the last realization returned, as plain lists and
+    # dictionaries so it can be saved with pickle or json
+    def get_state(self):
+        return {
+            "path": list(self.path),
+            "seen": sorted(self.seen),
+            "finished": self.finished,
+        }
+
+    def _edge_class(self, index_i, index_j):
+        names = sorted(
+            "5plus" if self.classes[index] in ("5", "6plus") else self.classes[index]
+            for index in (index_i, index_j)
+        )
+        return tuple(names)
+
+    # resume is the rest of the path to the realization to continue after, or None
+    def _search(self, vertex, resume):
+        if vertex == self.number_of_nodes:
+            if resume is None:
+                G = self._get_new_realization()
+                if G is not None:
+                    yield G
+            return
+
+        choices = self._get_choices(vertex)
+        start = resume[0] if resume else 0
+
+        for index in range(start, len(choices)):
+            chosen = choices[index]
+            self._add_neighbors(vertex, chosen)
+            self.path.append(index)
+
+            if self._is_feasible(vertex):
+                yield from self._search(
+                    vertex + 1, resume[1:] if resume and index == start else None
+                )
+
+            self.path.pop()
+            self._remove_neighbors(vertex, chosen)
+
+    # Returns every set of later vertices the vertex can be joined to, as tuples
+    def _get_choices(self, vertex):
+        degree = len(self.neighbors[vertex])
+        lowest = self.lowest_degree[vertex] - degree
+        highest = self.highest_degree[vertex] - degree
+
+        # Later vertices the vertex may be joined to, in blocks that can be swapped
+        blocks = {}
+        for other in range(vertex + 1, self.number_of_nodes):
+            pair_class = self._edge_class(vertex, other)
+            if (
+                self.remaining_edges.get(pair_class, 0) == 0
+                or len(self.neighbors[other]) >= self.highest_degree[other]
+            ):
+                continue
+
+            key = (
+                self.classes[other],
+                self.lowest_degree[other],
+                self.highest_degree[other],
+                tuple(sorted(self.neighbors[other])),
+            )
+            blocks.setdefault(key, []).append(other)
+        blocks = list(blocks.values())
+
+        choices = []
+
+        def choose(block_index, chosen, class_counts):
+            if len(chosen) > highest:
+                return
+
+            if block_index == len(blocks):
+                if len(chosen) >= lowest:
+                    choices.append(tuple(chosen))
+                return
+
+            block = blocks[block_index]
+            pair_class = self._edge_class(vertex, block[0])
+            for count in range(len(block) + 1):
+                if class_counts.get(pair_class, 0) + count > self.remaining_edges[
+                    pair_class
+                ]:
+                    break
+
+                choose(
+                    block_index + 1,
+                    chosen + block[:count],
+                    {**class_counts, pair_class: class_counts.get(pair_class, 0) + count},
+                )
+
+        choose(0, [], {})
+        return choices
+
+    def _add_neighbors(self, vertex, chosen):
+        for other in chosen:
+            self.neighbors[vertex].add(other)
+            self.neighbors[other].add(vertex)
+            self.remaining_edges[self._edge_class(vertex, other)] -= 1
+
+    def _remove_neighbors(self, vertex, chosen):
+        for other in chosen:
+            self.neighbors[vertex].discard(other)
+            self.neighbors[other].discard(vertex)
+            self.remaining_edges[self._edge_class(vertex, other)] += 1
+
+    # Checks that the later vertices can still take the edges left, and that the
+    # finished vertices do not form a component of their own
+    def _is_feasible(self, vertex):
+        for group in ("2", "3", "4", "5plus"):
+            later = [
+                other
+                for other in range(vertex + 1, self.number_of_nodes)
+                if self._edge_class(other, other)[0] == group
+            ]
+            lowest = sum(
+                max(self.lowest_degree[other] - len(self.neighbors[other]), 0)
+                for other in later
+            )
+            highest = sum(
+                self.highest_degree[other] - len(self.neighbors[other])
+                for other in later
+            )
+
+            demand = sum(
+                count * pair_class.count(group)
+                for pair_class, count in self.remaining_edges.items()
+            )
+            if not lowest <= demand <= highest:
+                return False
+
+        if not self._can_follow_v2_rule(vertex):
+            return False
+
+        return self._is_within_distance(vertex)
+
+    # Checks that no v2 vertex has a v3 and a v5plus neighbour that are adjacent, and
+    # once every v5plus vertex is finished, that the v2-v3 edges left can still go to v2
+    # vertices with more v5plus than v3 neighbours
+    def _can_follow_v2_rule(self, vertex):
+        v5plus_finished = all(
+            self.classes[other] not in ("5", "6plus")
+            for other in range(vertex + 1, self.number_of_nodes)
+        )
+        v3_slots = 0
+
+        for v2_vertex, class_name in enumerate(self.classes):
+            if class_name != "2":
+                continue
+
+            neighbors = self.neighbors[v2_vertex]
+            v3_neighbors = [other for other in neighbors if self.classes[other] == "3"]
+            v5plus_neighbors = [
+                other for other in neighbors if self.classes[other] in ("5", "6plus")
+            ]
+            if any(
+                index_i in self.neighbors[index_j]
+                for index_i in v3_neighbors
+                for index_j in v5plus_neighbors
+            ):
+                return False
+
+            if v5plus_finished:
+                if len(v3_neighbors) > len(v5plus_neighbors):
+                    return False
+
+                v3_slots += min(
+                    len(v5plus_neighbors) - len(v3_neighbors), 2 - len(neighbors)
+                )
+
+        return not v5plus_finished or self.remaining_edges[("2", "3")] <= v3_slots
+
+    # Checks that every finished vertex can still end up within distance 5 of every
+    # vertex. Later vertices with degree left may still be joined to each other, so they
+    # are treated as if they were all joined, which only makes the distances shorter
+    # This also finds finished vertices that form a component of their own
+    def _is_within_distance(self, vertex):
+        open_vertices = [
+            other
+            for other in range(vertex + 1, self.number_of_nodes)
+            if len(self.neighbors[other]) < self.highest_degree[other]
+        ]
+
+        for source in range(vertex + 1):
+            distances = {source: 0}
+            frontier = [source]
+            open_reached = False
+
+            while frontier and len(distances) < self.number_of_nodes:
+                next_frontier = []
+                for current in frontier:
+                    next_vertices = list(self.neighbors[current])
+                    if current in open_vertices and not open_reached:
+                        open_reached = True
+                        next_vertices.extend(open_vertices)
+
+                    for other in next_vertices:
+                        if other not in distances:
+                            distances[other] = distances[current] + 1
+                            next_frontier.append(other)
+                frontier = next_frontier
+
+            if len(distances) < self.number_of_nodes or max(distances.values()) > 5:
+                return False
+
+        return True
+
+    # Returns the realization just completed, or None if it is not a valid graph or is
+    # isomorphic to one returned before
+    def _get_new_realization(self):
+        G = nx.Graph()
+        G.add_nodes_from(range(self.number_of_nodes))
+        for vertex, vertex_neighbors in enumerate(self.neighbors):
+            G.add_edges_from((vertex, other) for other in vertex_neighbors if other > vertex)
+
+        if any(
+            len(nx.single_source_shortest_path_length(G, node, cutoff=5))
+            < self.number_of_nodes
+            for node in G.nodes
+        ):
+            return None
+
+        canonical_hash = GraphSymmetry.get_canonical_hash(G)
+        if canonical_hash in self.seen:
+            return None
+
+        self.seen.add(canonical_hash)
+        return G
@@ -0,0 +1,215 @@
+import networkx as nx
+import argparse
+import io
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+from PIL import Image
+import CheckBroadcastTime
+import LoadSavedGraph
+
+
+"""
+Saves drawings of broadcast spanning trees to image files or a PDF without opening any
+window, laying the trees out by their levels from the source
+"""
+
+
+# Layouts already worked out, by the shape of the rooted tree, as positions in the order
+# of get_canonical_order()
+_layout_cache = {}
+
+
+# Returns the shape of the tree rooted at root, equal for trees that are isomorphic as
+# rooted trees (the encoding of Aho, Hopcroft and Ullman), and the vertices in an order
+# that matches between trees of the same shape
+def get_canonical_order(tree, root):
+    parents = {root: None}
+    bfs_order = [root]
+    queue = deque([root])
+    while queue:
+        node = queue.popleft()
+        for neighbor in tree.neighbors(node):
+            if neighbor not in parents:
+                parents[neighbor] = node
+                bfs_order.append(neighbor)
+                queue.append(neighbor)
+
+    children = {node: [] for node in bfs_order}
+    for node in bfs_order[1:]:
+        children[parents[node]].append(node)
+
+    # Children are sorted by their own shape, deepest levels first
+    codes = {}
+    for node in reversed(bfs_order):
+        children[node].sort(key=codes.__getitem__)
+        codes[node] = "(" + "".join(codes[child] for child in children[node]) + ")"
+
+    order = []
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        order.append(node)
+        stack.extend(reversed(children[node]))
+
+    return codes[root], order, children
+
+
+# Positions of the vertices of a tree, the root at the top and every level from it one
+# row lower. Leaves are spaced evenly and every parent is centred over its children
+def get_tree_layout(tree, root):
+    shape, order, children = get_canonical_order(tree, root)
+
+    if shape not in _layout_cache:
+        positions = {}
+        next_leaf = 0
+
+        def place(node, depth):
+            nonlocal next_leaf
+            for child in children[node]:
+                place(child, depth + 1)
+
+            if children[node]:
+                x = (positions[children[node][0]][0] + positions[children[node][-1]][0]) / 2
+            else:
+                x = next_leaf
+                next_leaf += 1
+            positions[node] = (x, -depth)
+
+        place(root, 0)
+        _layout_cache[shape] = [positions[node] for node in order]
+
+    return dict(zip(order, _layout_cache[shape]))
+
+
+# Draws one page, a tree with its root in red, or a message if there is no tree
+def draw_tree(name, tree, root):
+    figure = Figure(figsize=(10, 6))
+    FigureCanvasAgg(figure)
+    ax = figure.add_subplot()
+    ax.set_title(name)
+
+    if tree is None:
+        ax.text(0.5, 0.5, "No broadcast spanning tree found", ha="center")
+        ax.set_axis_off()
+        return figure
+
+    nx.draw(
+        tree,
+        pos=get_tree_layout(tree, root),
+        ax=ax,
+        with_labels=True,
+        font_weight="bold",
+        node_color=["red" if node == root else "skyblue" for node in tree.nodes],
+        edge_color="gray",
+    )
+    return figure
+
+
+def _save_tree(name, tree, root, file_name):
+    draw_tree(name, tree, root).savefig(file_name)
+    return file_name
+
+
+# Returns the PNG image of a page drawn by draw_tree()
+def _render_tree(name, tree, root, dpi):
+    image = io.BytesIO()
+    draw_tree(name, tree, root).savefig(image, format="png", dpi=dpi)
+    return image.getvalue()
+
+
+# Runs function on every job across workers processes, returns the results in the order
+# of the jobs
+def _map(function, jobs, workers):
+    if workers is None:
+        workers = os.cpu_count()
+
+    if workers <= 1 or len(jobs) <= 1:
+        return [function(*job) for job in jobs]
+
+    with ProcessPoolExecutor(max_workers=min(workers, len(jobs))) as executor:
+        return list(executor.map(function, *zip(*jobs)))
+
+
+# Saves every (name, tree, root) item, tree being None when there is no tree, with the
+# trees drawn across workers processes
+# An output ending in .pdf gets one page per tree, the pages are drawn as images of dpi
+# dots per inch and joined in order. Any other output is a directory getting one PNG
+# file per tree
+# Returns the files written
+def save_trees(items, output, workers=None, dpi=150):
+    if output.endswith(".pdf"):
+        pages = _map(
+            _render_tree, [(name, tree, root, dpi) for name, tree, root in items], workers
+        )
+        if not pages:
+            return []
+
+        images = [Image.open(io.BytesIO(page)).convert("RGB") for page in pages]
+        images[0].save(
+            output, save_all=True, append_images=images[1:], resolution=dpi
+        )
+        return [output]
+
+    os.makedirs(output, exist_ok=True)
+    jobs = [
+        (name, tree, root, os.path.join(output, name + ".png"))
+        for name, tree, root in items
+    ]
+    return _map(_save_tree, jobs, workers)
+
+
+# Saves the broadcast spanning tree of every source of G, see save_trees()
+def save_spanning_trees(
+    G, output, max_attempts=200, broadcast_time=None, use_orbits=False, workers=None
+):
+    spanning_trees = CheckBroadcastTime.get_spanning_trees(
+        G, max_attempts, broadcast_time, use_orbits
+    )
+    return save_trees(get_tree_items(spanning_trees), output, workers)
+
+
+# The items of save_trees() for a dictionary of spanning trees by source, as returned by
+# CheckBroadcastTime.get_spanning_trees()
+def get_tree_items(spanning_trees):
+    return [
+        ("tree at node " + str(source), spanning_tree or None, source)
+        for source, spanning_tree in spanning_trees.items()
+    ]
+
+
+# Saves the spanning trees of every saved graph (see LoadSavedGraph.read_saved_graphs())
+# to output_directory, one PDF per graph, with the graphs drawn across workers processes
+def main(paths, output_directory, max_attempts=300, workers=None):
+    os.makedirs(output_directory, exist_ok=True)
+
+    jobs = []
+    for file_name, record, nodes, edges in LoadSavedGraph.read_saved_graphs(paths):
+        name = os.path.splitext(os.path.basename(file_name))[0]
+        if record is not None:
+            name += " " + str(record)
+        jobs.append(
+            (nodes, edges, os.path.join(output_directory, name + ".pdf"), max_attempts)
+        )
+
+    files = _map(_save_saved_graph, jobs, workers)
+    print("Saved", len(files), "files to", output_directory)
+
+
+# The pages of a graph are drawn in the worker of the graph
+def _save_saved_graph(nodes, edges, output, max_attempts):
+    G = LoadSavedGraph.build_graph(nodes, edges)
+    return save_spanning_trees(G, output, max_attempts, workers=1)[0]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("paths", nargs="+")
+    parser.add_argument("--output", default="Spanning trees")
+    parser.add_argument("--max-attempts", type=int, default=300)
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    main(args.paths, args.output, args.max_attempts, args.workers)
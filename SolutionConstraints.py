@@ -0,0 +1,124 @@
+"""
+The constraints on the integer solutions, in one table used by both the loops of
+PrintIntegerSolutions.py and the NumPy blocks of VectorizedConstraints.py
+"""
+
+
+# Each constraint is the value after which it can be checked and a function of the
+# values known so far, s["v2"], s["e23"] and so on. The functions only use arithmetic,
+# comparisons, & and |, so they work on single values as well as on NumPy arrays of
+# values, where they give the mask of the candidates that pass
+# Values are chosen in the order v2, v3, v4, v5 (which also sets v6plus), delta, e23,
+# e24 (which also sets e25plus), e33, e34 (which also sets e35plus) and e44 (which also
+# sets e45plus and e55plus)
+# A new constraint only needs a line here, the loop bounds of PrintIntegerSolutions only
+# skip values these constraints reject
+
+
+# preforms ceiling(a / b) but cleaner
+def ceiling_divide(a, b):
+    return (a + b - 1) // b
+
+
+# preforms n choose 2
+def n_choose_2(n):
+    return (n * (n - 1)) // 2
+
+
+def v5plus(s):
+    return s["v5"] + s["v6plus"]
+
+
+def v4plus(s):
+    return s["v4"] + v5plus(s)
+
+
+# Constraints found by Gabriel Talih
+# Checks if the number of edges gurantees no self-loops or multi-edges
+simple_graph_constraints = [
+    ("e33", lambda s: s["e33"] <= n_choose_2(s["v3"])),
+    ("e44", lambda s: s["e44"] <= n_choose_2(s["v4"])),
+    ("e44", lambda s: s["e55plus"] <= n_choose_2(v5plus(s))),
+    ("e23", lambda s: s["e23"] <= s["v2"] * s["v3"]),
+    ("e24", lambda s: s["e24"] <= s["v2"] * s["v4"]),
+    ("e24", lambda s: s["e25plus"] <= s["v2"] * v5plus(s)),
+    ("e34", lambda s: s["e34"] <= s["v3"] * s["v4"]),
+    ("e34", lambda s: s["e35plus"] <= s["v3"] * v5plus(s)),
+    ("e44", lambda s: s["e45plus"] <= s["v4"] * v5plus(s)),
+]
+
+# Constraints found in "Tight lower bounds on broadcast function for n = 24 and 25"
+old_constraints = [
+    ("e23", lambda s: s["e23"] <= 2 * s["v3"]),
+    ("e34", lambda s: s["e23"] <= s["v3"] + s["e34"] + s["e35plus"]),
+    ("e24", lambda s: s["e23"] <= s["e25plus"]),
+    ("e24", lambda s: s["e24"] <= 3 * s["v4"]),
+    (
+        "e24",
+        lambda s: s["e24"] <= 3 * s["v4"] - ceiling_divide(s["v2"] - s["e25plus"], 2),
+    ),
+    (
+        "e24",
+        lambda s: s["e25plus"]
+        <= 4 * s["v5"]
+        + s["v6plus"] * (s["delta"] - 1)
+        - ceiling_divide(s["e23"], s["delta"] - 2),
+    ),
+    (
+        "e44",
+        lambda s: s["e45plus"] + s["e55plus"]
+        >= ceiling_divide(s["e23"], s["delta"] - 2),
+    ),
+]
+
+# New constraints conjectured by Mohammad Hossein, only known for n = 24 with 35 edges
+new_constraints = [
+    ("v2", lambda s: (9 <= s["v2"]) & (s["v2"] <= 12)),
+    ("delta", lambda s: (5 <= s["delta"]) & (s["delta"] <= 8)),
+    ("v5", lambda s: (4 <= v4plus(s)) & (v4plus(s) <= 9)),
+    ("v3", lambda s: (3 <= s["v3"]) & (s["v3"] <= 11)),
+    ("e24", lambda s: s["v2"] <= 6 * s["v4"] - 2 * s["e24"] + s["e25plus"]),
+    ("v3", lambda s: s["v3"] >= 27 - 2 * s["v2"]),
+    ("e24", lambda s: 2 * s["v2"] <= s["e24"] + 2 * s["e25plus"]),
+    ("delta", lambda s: s["delta"] <= s["v2"] - 2),
+    ("e24", lambda s: 5 * s["v2"] <= 6 * s["v4"] + 5 * s["e25plus"]),
+    (
+        "v5",
+        lambda s: (v4plus(s) < s["v2"] - 3)
+        | (
+            (s["v3"] == 27 - 2 * s["v2"])
+            & (s["v4"] == s["v2"] - 4)
+            & (s["v5"] == 1)
+            & (s["v6plus"] == 0)
+        ),
+    ),
+    ("e24", lambda s: s["e25plus"] >= 3),
+    ("delta", lambda s: s["delta"] + v4plus(s) <= s["v2"] + 2),
+    ("delta", lambda s: s["delta"] <= 2 * s["v2"] + s["v3"] - 22),
+    ("delta", lambda s: s["delta"] <= s["v3"] + 2),
+    ("delta", lambda s: s["delta"] + v4plus(s) <= 14),
+]
+
+
+# Returns the constraints to check, as a dictionary from the value after which they can
+# be checked to their functions
+def get_constraints(n, edges, check_new_constraints=True):
+    if check_new_constraints and (n, edges) != (24, 35):
+        raise ValueError("The new constraints only apply to n = 24 with 35 edges")
+
+    constraints = simple_graph_constraints + old_constraints
+    if check_new_constraints:
+        constraints = constraints + new_constraints
+
+    by_stage = {}
+    for stage, constraint in constraints:
+        by_stage.setdefault(stage, []).append(constraint)
+    return by_stage
+
+
+# Checks the constraints of a stage on the values of a single candidate
+def passes(constraints, stage, s):
+    for constraint in constraints.get(stage, ()):
+        if not constraint(s):
+            return False
+    return True
@@ -0,0 +1,244 @@
+import numpy as np
+import os
+import shutil
+
+
+"""
+Stores integer solutions in a compact binary file that can be memory mapped, with an
+index on every column so rows can be looked up by value without reading the whole file
+"""
+
+
+# Columns of a row, in the order of the text file written by PrintIntegerSolutions
+columns = [
+    "v2",
+    "v3",
+    "v4",
+    "v5",
+    "v6plus",
+    "delta",
+    "e23",
+    "e24",
+    "e25plus",
+    "e33",
+    "e34",
+    "e35plus",
+    "e44",
+    "e45plus",
+    "e55plus",
+]
+
+magic = b"B24SOLN1"
+
+# The header takes 32 bytes, rows follow it with one unsigned integer per column
+header_dtype = np.dtype(
+    [
+        ("magic", "S8"),
+        ("columns", "<u4"),
+        ("itemsize", "<u4"),
+        ("rows", "<u8"),
+        ("n", "<u4"),
+        ("edges", "<u4"),
+    ]
+)
+
+
+# Every value of a row is at most n or edges, so one byte is enough for small graphs
+def get_value_dtype(n, edges):
+    return np.dtype("u1") if max(n, edges) <= np.iinfo("u1").max else np.dtype("<u2")
+
+
+# Checks if the file starts like a solution store, so text files can be told apart
+def is_solution_store(file_path):
+    if not os.path.exists(file_path):
+        return False
+
+    with open(file_path, "rb") as file:
+        return file.read(len(magic)) == magic
+
+
+# Writes rows without a header, for shard files that are later added to a store with
+# SolutionWriter.append_file()
+def write_rows(file, rows, value_dtype):
+    np.asarray(rows, dtype=np.int64).reshape(-1, len(columns)).astype(
+        value_dtype
+    ).tofile(file)
+
+
+# Writes a store one block of rows at a time, the row count in the header and the index
+# are written by close()
+class SolutionWriter:
+    def __init__(self, file_path, n=24, edges=35):
+        self.file_path = file_path
+        self.n = n
+        self.edges = edges
+        self.value_dtype = get_value_dtype(n, edges)
+        self.rows = 0
+
+        self.file = open(file_path, "wb")
+        self._write_header()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exception):
+        self.close()
+
+    def _write_header(self):
+        header = np.zeros(1, dtype=header_dtype)
+        header["magic"] = magic
+        header["columns"] = len(columns)
+        header["itemsize"] = self.value_dtype.itemsize
+        header["rows"] = self.rows
+        header["n"] = self.n
+        header["edges"] = self.edges
+
+        self.file.seek(0)
+        header.tofile(self.file)
+        self.file.seek(0, os.SEEK_END)
+
+    # rows is a sequence of rows of 15 integers or an array of shape (rows, 15)
+    def write(self, rows):
+        rows = np.asarray(rows, dtype=np.int64).reshape(-1, len(columns))
+        write_rows(self.file, rows, self.value_dtype)
+        self.rows += len(rows)
+
+    # Adds the rows of a file written by write_rows() with the same value type
+    def append_file(self, file_path):
+        with open(file_path, "rb") as file:
+            shutil.copyfileobj(file, self.file)
+
+        row_size = len(columns) * self.value_dtype.itemsize
+        self.rows += os.path.getsize(file_path) // row_size
+
+    def close(self):
+        if self.file.closed:
+            return
+
+        self._write_header()
+        self.file.close()
+        build_index(self.file_path)
+
+
+# The index of a column is the positions of the rows sorted by their value in that
+# column, with starts[value] the first position having that value, so the rows with a
+# value are order[starts[value]:starts[value + 1]], in increasing order
+def build_index(file_path):
+    rows = SolutionStore(file_path, load_index=False).rows
+
+    # Positions take the smallest type that holds every row
+    position_dtype = np.int64
+    for dtype in (np.uint16, np.uint32):
+        if len(rows) <= np.iinfo(dtype).max:
+            position_dtype = dtype
+            break
+
+    index = {"rows": np.array(len(rows))}
+    for column_index, column in enumerate(columns):
+        values = np.asarray(rows[:, column_index])
+        index[column + "_order"] = np.argsort(values, kind="stable").astype(
+            position_dtype
+        )
+        index[column + "_starts"] = np.concatenate(
+            [[0], np.cumsum(np.bincount(values, minlength=1))]
+        )
+
+    np.savez(get_index_path(file_path), **index)
+
+
+def get_index_path(file_path):
+    return file_path + ".idx.npz"
+
+
+# Reads a store written by SolutionWriter. rows is a read only memory map of shape
+# (number of rows, 15), so only the rows used are read from the file
+class SolutionStore:
+    def __init__(self, file_path, load_index=True):
+        self.file_path = file_path
+
+        header = np.fromfile(file_path, dtype=header_dtype, count=1)
+        if len(header) == 0 or header["magic"][0] != magic:
+            raise ValueError(file_path + " is not a solution store")
+
+        header = header[0]
+        if header["columns"] != len(columns):
+            raise ValueError("Solution store rows must have exactly 15 columns")
+
+        self.n = int(header["n"])
+        self.edges = int(header["edges"])
+        value_dtype = np.dtype("u1") if header["itemsize"] == 1 else np.dtype("<u2")
+
+        self.rows = np.memmap(
+            file_path,
+            dtype=value_dtype,
+            mode="r",
+            offset=header_dtype.itemsize,
+            shape=(int(header["rows"]), len(columns)),
+        )
+
+        self.index = None
+        if load_index:
+            self.index = self._load_index()
+
+    def __len__(self):
+        return len(self.rows)
+
+    # Returns row i as a list of 15 integers
+    def __getitem__(self, i):
+        return self.rows[i].tolist()
+
+    # Returns every row as lists of 15 integers
+    def read_all(self):
+        return np.asarray(self.rows).tolist()
+
+    # The index is rebuilt if it is missing or was built for a different file
+    def _load_index(self):
+        index_path = get_index_path(self.file_path)
+        if not os.path.exists(index_path) or os.path.getmtime(
+            index_path
+        ) < os.path.getmtime(self.file_path):
+            build_index(self.file_path)
+
+        with np.load(index_path) as index:
+            index = dict(index)
+
+        if int(index["rows"]) != len(self.rows):
+            build_index(self.file_path)
+            with np.load(index_path) as index:
+                index = dict(index)
+
+        return index
+
+    # Returns the positions of the rows that match every condition, in increasing order
+    # A condition is a value the column must have, or a range of values, for example
+    # query(delta=5, v2=9) or query(v3=range(3, 6))
+    def query(self, **conditions):
+        matches = None
+
+        for column, condition in conditions.items():
+            if column not in columns:
+                raise ValueError("Unknown column: " + column)
+
+            order = self.index[column + "_order"]
+            starts = self.index[column + "_starts"]
+
+            values = condition if isinstance(condition, range) else [condition]
+            parts = [
+                order[starts[value] : starts[value + 1]]
+                for value in values
+                if 0 <= value < len(starts) - 1
+            ]
+            positions = (
+                np.sort(np.concatenate(parts)) if parts else np.zeros(0, dtype=np.int64)
+            )
+
+            matches = (
+                positions
+                if matches is None
+                else np.intersect1d(matches, positions, assume_unique=True)
+            )
+
+        if matches is None:
+            return np.arange(len(self.rows))
+
+        return matches.astype(np.int64)
@@ -0,0 +1,69 @@
+import math
+from PreparedGraph import prepare_graph
+
+
+"""
+Orders the sources of a graph so the ones most likely to fail are checked first, most
+candidate graphs are not broadcast graphs and fail at a single hard source
+"""
+
+
+# Counts how often sources with the same features failed, across all graphs checked
+# with the same statistics
+class SourceStatistics:
+    def __init__(self):
+        # Maps source features to [failures, checks]
+        self.counts = {}
+
+    def record(self, features, failed):
+        counts = self.counts.setdefault(features, [0, 0])
+        counts[0] += int(failed)
+        counts[1] += 1
+
+    # Laplace estimate of the failure rate, 0.5 for features never seen
+    def get_failure_rate(self, features):
+        failures, checks = self.counts.get(features, (0, 0))
+        return (failures + 1) / (checks + 2)
+
+
+# Returns (degree, eccentricity, layer slack) of a source
+# The layer slack is how many vertices the source has to spare over the fewest it needs
+# within each distance: after broadcast_time - j rounds at least ceil(n / 2^j) vertices
+# are informed, and they are all within distance broadcast_time - j of the source.
+# A negative slack means the source can not reach broadcast_time at all
+def get_source_features(G, source, broadcast_time):
+    G = prepare_graph(G)
+    n = G.number_of_nodes
+
+    layer_counts = G.get_layer_counts(source)
+    eccentricity = len(layer_counts) - 1
+
+    within_distance = []
+    total = 0
+    for layer_count in layer_counts:
+        total += layer_count
+        within_distance.append(total)
+
+    slack = n
+    for j in range(1, broadcast_time + 1):
+        distance = min(broadcast_time - j, eccentricity)
+        slack = min(slack, within_distance[distance] - math.ceil(n / 2**j))
+
+    return G.degree[source], eccentricity, slack
+
+
+# Returns the sources ordered from the most to the least likely to fail
+# Past failure rates come first when statistics are given, then the smallest layer
+# slack, the lowest degree and the highest eccentricity
+def rank_sources(G, sources, broadcast_time, statistics=None):
+    G = prepare_graph(G)
+
+    def risk(source):
+        degree, eccentricity, slack = get_source_features(G, source, broadcast_time)
+        failure_rate = 0
+        if statistics is not None:
+            failure_rate = statistics.get_failure_rate((degree, eccentricity, slack))
+
+        return -failure_rate, slack, degree, -eccentricity, source
+
+    return sorted(sources, key=risk)
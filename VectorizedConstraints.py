@@ -0,0 +1,226 @@
+import numpy as np
+import SolutionConstraints
+
+
+"""
+Finds the integer solutions of the constraints with NumPy, checking every constraint on
+whole blocks of candidates at once instead of one candidate at a time
+"""
+
+
+# Columns of a solution in the order of the output file
+columns = [
+    "v2",
+    "v3",
+    "v4",
+    "v5",
+    "v6plus",
+    "delta",
+    "e23",
+    "e24",
+    "e25plus",
+    "e33",
+    "e34",
+    "e35plus",
+    "e44",
+    "e45plus",
+    "e55plus",
+]
+
+solution_dtype = np.dtype([(column, np.int64) for column in columns])
+
+
+# Values of a solution are chosen one at a time, each one over the range
+# lowest(block) to highest(block) for every candidate of the block. The other values are
+# worked out from the ones chosen so far, and every constraint is checked as soon as the
+# values it uses are known. This gives the solutions in the same order as
+# PrintIntegerSolutions.enumerate_solutions()
+def get_vertex_stages(n, edges):
+    total_degree = 2 * edges
+
+    def degree_sum(s):
+        return 2 * s["v2"] + 3 * s["v3"] + 4 * s["v4"] + 5 * s["v5"]
+
+    def set_v6plus(s):
+        s["v6plus"] = n - s["v2"] - s["v3"] - s["v4"] - s["v5"]
+
+    # Without v6plus vertices, delta is the highest degree found
+    def lowest_delta(s):
+        return np.where(
+            s["v6plus"] > 0,
+            6,
+            np.where(s["v5"] > 0, 5, np.where(s["v4"] > 0, 4, 3)),
+        )
+
+    def highest_delta(s):
+        return np.where(s["v6plus"] > 0, n - 1, lowest_delta(s))
+
+    # Makes sure the number of vertices is n, and makes sure the total degree is
+    # 2 * edges
+    def has_total_degree(s):
+        return np.where(
+            s["v6plus"] > 0,
+            (degree_sum(s) + 6 * (s["v6plus"] - 1) + s["delta"] <= total_degree)
+            & (degree_sum(s) + s["delta"] * s["v6plus"] >= total_degree),
+            degree_sum(s) == total_degree,
+        )
+
+    return [
+        ("v2", lambda s: 0, lambda s: n, None),
+        ("v3", lambda s: 0, lambda s: n - s["v2"], None),
+        ("v4", lambda s: 0, lambda s: n - s["v2"] - s["v3"], None),
+        ("v5", lambda s: 0, lambda s: n - s["v2"] - s["v3"] - s["v4"], set_v6plus),
+        ("delta", lowest_delta, highest_delta, None),
+    ], [("delta", has_total_degree)]
+
+
+# Ranges of the edge values only keep the degree sums of the vertices non negative, the
+# constraints do the rest. e25plus, e35plus, e45plus and e55plus are worked out from the
+# other edge values
+def get_edge_stages(edges):
+    def set_e25plus(s):
+        s["e25plus"] = 2 * s["v2"] - s["e23"] - s["e24"]
+
+    def set_e35plus(s):
+        s["e35plus"] = 3 * s["v3"] - s["e23"] - 2 * s["e33"] - s["e34"]
+
+    def set_e45plus_and_e55plus(s):
+        s["e45plus"] = 4 * s["v4"] - s["e24"] - s["e34"] - 2 * s["e44"]
+        s["e55plus"] = (
+            edges
+            - s["e23"]
+            - s["e24"]
+            - s["e25plus"]
+            - s["e33"]
+            - s["e34"]
+            - s["e35plus"]
+            - s["e44"]
+            - s["e45plus"]
+        )
+
+    return [
+        ("e23", lambda s: 0, lambda s: np.minimum(2 * s["v2"], 3 * s["v3"]), None),
+        (
+            "e24",
+            lambda s: 0,
+            lambda s: np.minimum(2 * s["v2"], 4 * s["v4"]),
+            set_e25plus,
+        ),
+        ("e33", lambda s: 0, lambda s: (3 * s["v3"]) // 2, None),
+        (
+            "e34",
+            lambda s: 0,
+            lambda s: np.minimum(
+                3 * s["v3"] - 2 * s["e33"] - s["e23"], 4 * s["v4"] - s["e24"]
+            ),
+            set_e35plus,
+        ),
+        (
+            "e44",
+            lambda s: 0,
+            lambda s: (4 * s["v4"] - s["e24"] - s["e34"]) // 2,
+            set_e45plus_and_e55plus,
+        ),
+    ], [("e44", lambda s: s["e55plus"] >= 0)]
+
+
+# Returns the constraints of SolutionConstraints with the degree sums of the stages, as a
+# dictionary from the value after which they can be checked to their mask functions
+def get_constraints(n, edges, check_new_constraints=True):
+    constraints = SolutionConstraints.get_constraints(n, edges, check_new_constraints)
+
+    for stage, constraint in get_vertex_stages(n, edges)[1] + get_edge_stages(edges)[1]:
+        constraints.setdefault(stage, []).insert(0, constraint)
+    return constraints
+
+
+# Returns the vertex profiles (v2, v3, v4, v5, v6plus, delta) as a structured array,
+# in the same order as PrintIntegerSolutions.enumerate_vertices()
+def get_vertex_profiles(n=24, edges=35, check_new_constraints=True):
+    constraints = get_constraints(n, edges, check_new_constraints)
+    block = np.zeros(1, dtype=solution_dtype)
+    blocks = list(_search(block, get_vertex_stages(n, edges)[0], constraints, np.inf))
+    return np.concatenate(blocks)[columns[:6]] if blocks else block[:0][columns[:6]]
+
+
+# Yields blocks of solutions with the given vertex profiles, in the order of the output
+# file. Blocks are split so that no more than about block_size candidates are
+# materialized at once
+def get_solution_blocks(
+    profiles, n=24, edges=35, check_new_constraints=True, block_size=1 << 20
+):
+    constraints = get_constraints(n, edges, check_new_constraints)
+
+    block = np.zeros(len(profiles), dtype=solution_dtype)
+    for index, column in enumerate(columns[:6]):
+        block[column] = [profile[index] for profile in profiles]
+
+    yield from _search(block, get_edge_stages(edges)[0], constraints, block_size)
+
+
+# Row of the output file, the same as PrintIntegerSolutions.format_solution()
+row_format = " %2d | %2d | %2d | %2d | %6d | %5d | %3d | %3d | %7d | %3d | %3d | %7d | %3d | %7d | %7d \n"
+
+
+# Writes the solutions with the given vertex profiles one block at a time, returns how
+# many were written
+def write_solutions(
+    file_writer, profiles, n=24, edges=35, check_new_constraints=True, block_size=1 << 20
+):
+    solution_count = 0
+    for block in get_solution_blocks(
+        profiles, n, edges, check_new_constraints, block_size
+    ):
+        solution_count += len(block)
+        rows = block.view(np.int64).reshape(-1, len(columns)).tolist()
+        file_writer.write("".join(row_format % tuple(row) for row in rows))
+
+    return solution_count
+
+
+# Chooses the value of the first stage for every candidate of the block, keeps the
+# candidates that pass the constraints checked after it and continues with the next
+# stage. Candidates are split into blocks of about block_size before they are expanded
+def _search(block, stages, constraints, block_size):
+    if len(block) == 0:
+        return
+
+    if not stages:
+        yield block
+        return
+
+    name, lowest, highest, set_values = stages[0]
+    lowest_values = np.broadcast_to(lowest(block), len(block))
+    counts = np.maximum(
+        np.broadcast_to(highest(block), len(block)) - lowest_values + 1, 0
+    )
+
+    # Splits the block so every part expands to at most block_size candidates, a single
+    # candidate is never split
+    ends = np.cumsum(counts)
+    start = 0
+    while start < len(block):
+        offset = ends[start - 1] if start > 0 else 0
+        stop = max(
+            int(np.searchsorted(ends, offset + block_size, side="right")), start + 1
+        )
+        part_counts = counts[start:stop]
+
+        rows = np.repeat(np.arange(start, stop), part_counts)
+        part_starts = np.cumsum(part_counts) - part_counts
+        expanded = block[rows]
+        expanded[name] = (
+            np.arange(len(rows))
+            - np.repeat(part_starts, part_counts)
+            + lowest_values[rows]
+        )
+
+        if set_values is not None:
+            set_values(expanded)
+
+        mask = np.ones(len(expanded), dtype=bool)
+        for constraint in constraints.get(name, []):
+            mask &= constraint(expanded)
+
+        yield from _search(expanded[mask], stages[1:], constraints, block_size)
+        start = stop
@@ -0,0 +1,166 @@
+import networkx as nx
+import os
+import pickle
+import GraphSymmetry
+from PreparedGraph import prepare_graph
+
+
+"""
+Remembers the verdict of every verified graph, so a graph isomorphic to one verified
+before (in this run or a previous one) does not have to be verified again
+"""
+
+
+# Entries are grouped by GraphSymmetry.get_invariant_hash(), so a lookup only compares
+# the graph against the few entries sharing its hash
+# Every entry stores the edges of the verified graph, its verdict with its confidence,
+# the broadcast time it was verified for and its spanning tree for every source (or None)
+# A False verdict that is not certain also stores the max_attempts it was found with,
+# and is only returned to lookups asking for at most as many attempts
+class VerifiedGraphCache:
+    def __init__(self, file_path=None):
+        self.file_path = file_path
+        self.entries = {}
+
+        # Entries stored since the last take_new_entries(), for merging into another cache
+        self.new_entries = []
+
+        if file_path is not None and os.path.exists(file_path):
+            with open(file_path, "rb") as file:
+                self.entries = pickle.load(file)
+
+    def __len__(self):
+        return sum(len(bucket) for bucket in self.entries.values())
+
+    # Returns the entry of a graph isomorphic to G, with the spanning trees relabelled to
+    # the vertices of G, or None if no such graph was verified
+    # Set max_attempts to also return None when the verdict is an uncertain False found
+    # with fewer attempts
+    def lookup(self, G, max_attempts=None):
+        G = prepare_graph(G)
+
+        found = self._find_entry(G)
+        if found is None:
+            return None
+
+        entry, isomorphism = found
+        entry_max_attempts = _get_max_attempts(entry)
+        if (
+            max_attempts is not None
+            and entry_max_attempts is not None
+            and entry_max_attempts < max_attempts
+        ):
+            return None
+
+        trees = None
+        if entry["trees"] is not None:
+            trees = {
+                isomorphism[source]: (
+                    None
+                    if tree_edges is None
+                    else [(isomorphism[u], isomorphism[v]) for u, v in tree_edges]
+                )
+                for source, tree_edges in entry["trees"].items()
+            }
+
+        return {
+            "verdict": entry["verdict"],
+            "confidence": entry.get("confidence", 1.0),
+            "broadcast_time": entry["broadcast_time"],
+            "max_attempts": entry_max_attempts,
+            "trees": trees,
+        }
+
+    # Stores the verdict for G, trees maps every source to its spanning tree (or None)
+    # Set max_attempts for a False verdict that is not certain. A graph already stored
+    # is only stored again when the new verdict is certain and the old one was not, or
+    # was found with more attempts
+    def store(
+        self, G, verdict, broadcast_time, trees=None, confidence=1.0, max_attempts=None
+    ):
+        G = prepare_graph(G)
+
+        entry = {
+            "hash": GraphSymmetry.get_invariant_hash(G),
+            "number_of_nodes": G.number_of_nodes,
+            "edges": list(G.graph.edges),
+            "verdict": verdict,
+            "confidence": confidence,
+            "broadcast_time": broadcast_time,
+            "max_attempts": None if verdict else max_attempts,
+            "trees": None,
+        }
+        if trees is not None:
+            entry["trees"] = {
+                source: None if tree is None else list(tree.edges)
+                for source, tree in trees.items()
+            }
+
+        if self._add_entry(entry, G):
+            self.new_entries.append(entry)
+
+    # Returns the entries stored since the last call
+    def take_new_entries(self):
+        new_entries = self.new_entries
+        self.new_entries = []
+        return new_entries
+
+    # Adds entries taken from another cache, skipping graphs already in this one with a
+    # verdict at least as strong
+    def add_entries(self, entries):
+        for entry in entries:
+            self._add_entry(entry, _get_entry_graph(entry))
+
+    def save(self):
+        # Writes to a temporary file first, so an interrupted save keeps the old cache
+        temporary_file_path = self.file_path + ".tmp"
+        with open(temporary_file_path, "wb") as file:
+            pickle.dump(self.entries, file)
+
+        os.replace(temporary_file_path, self.file_path)
+
+    # Returns the stored entry of a graph isomorphic to G and the isomorphism from it to
+    # G, or None
+    def _find_entry(self, G):
+        for entry in self.entries.get(GraphSymmetry.get_invariant_hash(G), []):
+            isomorphism = GraphSymmetry.find_isomorphism(_get_entry_graph(entry), G)
+            if isomorphism is not None:
+                return entry, isomorphism
+
+        return None
+
+    # Adds entry, the entry of G, unless G is stored with a verdict at least as strong
+    # Returns whether the entry was added
+    def _add_entry(self, entry, G):
+        bucket = self.entries.setdefault(entry["hash"], [])
+
+        found = self._find_entry(prepare_graph(G))
+        if found is not None:
+            old_entry = found[0]
+            old_max_attempts = _get_max_attempts(old_entry)
+            new_max_attempts = _get_max_attempts(entry)
+            if old_max_attempts is None or (
+                new_max_attempts is not None and new_max_attempts <= old_max_attempts
+            ):
+                return False
+
+            bucket.remove(old_entry)
+
+        bucket.append(entry)
+        return True
+
+
+# max_attempts of an entry, None when its verdict is certain. Uncertain False verdicts
+# stored before max_attempts was recorded count as found with 0 attempts
+def _get_max_attempts(entry):
+    if entry["verdict"]:
+        return None
+
+    return entry.get("max_attempts", 0)
+
+
+def _get_entry_graph(entry):
+    G = nx.Graph()
+    G.add_nodes_from(range(entry["number_of_nodes"]))
+    G.add_edges_from(entry["edges"])
+    return G